@@ -0,0 +1,137 @@
+import base64
+import bisect
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Default connection settings for the visualizer API
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 120
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_POOL_SIZE = 10
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+# Tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 60
+
+# Lifetime assumed for tokens whose expiry cannot be read
+DEFAULT_TOKEN_LIFETIME = 300
+
+
+def _token_expiry(token):
+    """
+    Read the expiry timestamp from a JWT without verifying it.
+
+    Returns:
+        float or None: Expiry as a Unix timestamp, None if the token has no readable expiry
+    """
+    try:
+        claims = token.split(".")[1]
+        claims += "=" * (-len(claims) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(claims))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenCache:
+    """
+    Cache an access token and fetch a new one shortly before it expires.
+    """
+
+    def __init__(self, fetch_token, refresh_margin=TOKEN_REFRESH_MARGIN):
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._token is None or time.time() >= self._expires_at - self.refresh_margin:
+                self._token = self.fetch_token()
+                self._expires_at = _token_expiry(self._token) or time.time() + DEFAULT_TOKEN_LIFETIME
+            return self._token
+
+    def invalidate(self):
+        with self._lock:
+            self._token = None
+
+
+class ApiClient:
+    """
+    HTTP client with a pooled session, timeouts, retries and latency tracking.
+    """
+
+    def __init__(
+        self,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+        pool_size=DEFAULT_POOL_SIZE,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+
+        # Retry connection errors and 5xx/429 responses with exponential backoff; a read
+        # timeout means the API may still be working on the request, so it is not retried
+        retry = Retry(
+            total=max_retries,
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self._latency_sum = 0.0
+        self._lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        """
+        Send a POST request through the pooled session and record its latency.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            return self.session.post(url, **kwargs)
+        finally:
+            self._record_latency(time.perf_counter() - start)
+
+    def _record_latency(self, seconds):
+        with self._lock:
+            self._bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self._latency_sum += seconds
+
+    def latency_histogram(self):
+        """
+        Return the request latency histogram.
+
+        Returns:
+            dict: Number of calls, total seconds and the count per bucket upper bound
+        """
+        with self._lock:
+            return {
+                "count": sum(self._bucket_counts),
+                "sum_seconds": self._latency_sum,
+                "buckets": dict(zip(LATENCY_BUCKETS, self._bucket_counts)),
+            }
+
+    def close(self):
+        self.session.close()
+
+
+# Shared across Streamlit reruns so connections are reused
+visualizer_client = ApiClient()
@@ -1,7 +1,35 @@
+import numpy as np
 import pandas as pd
 import requests
 import streamlit as st
-from utils import call_visualizer_api, log_test_result, initialize_session_state, generate_test_case_name
+from utils import (
+    call_visualizer_api,
+    generate_test_case_name,
+    initialize_session_state,
+    log_test_result,
+)
+from comparison import DEFAULT_ATOL, DEFAULT_RTOL, join_results, summarize_comparison
+from plan import validate_plan
+from rendering import DEFAULT_PAGE_SIZE, PAGE_SIZE_OPTIONS, render_table
+from payload import PAYLOAD_FORMATS, columns_in_prompt
+from api_client import visualizer_client
+from cache import fingerprint, hash_upload, run_stage, stage_cache
+from filters import FILTER_BACKENDS, apply_filter_spec
+from profiling import RunProfile
+from history import render_history
+from log_store import open_log_store
+from parallel import default_workers
+from ingestion import (
+    DEFAULT_MEMORY_BUDGET_MB,
+    STREAMING_ENGINES,
+    chunk_rows_for_budget,
+    chunked_group_sum,
+    column_stats,
+    group_sum,
+    iter_upload_chunks,
+    optimize_dtypes,
+    read_upload,
+)
 
 # Streamlit Page Configuration
 st.set_page_config(page_title="Data Validator", layout="wide")
@@ -15,6 +43,12 @@ def main():
     st.title("📊 Data Validator")
     st.sidebar.title("🔍 Upload and Analyze Data")
 
+    # Logged test cases can be browsed without uploading a file
+    view = st.sidebar.radio("View", options=["Validate Data", "Test History"], horizontal=True)
+    if view == "Test History":
+        render_history(open_log_store())
+        return
+
     # File Upload and Processing
     uploaded_file = st.sidebar.file_uploader(
         "Upload an Excel or CSV File", type=["xls", "xlsx", "csv"]
@@ -30,25 +64,101 @@ def main():
 
     if uploaded_file is not None:
         try:
-            # Detect file type and load data
-            if uploaded_file.name.endswith(".csv"):
-                data = pd.read_csv(uploaded_file)
+            # Streaming mode keeps only one chunk of the upload in memory at a time
+            st.sidebar.subheader("⚡ Large File Handling")
+            # The stage cache is shared by all sessions, so its size is set by the server
+            # (VISUALIZER_STAGE_CACHE_MB) rather than from the sidebar
+            cache_stats = stage_cache.stats()
+            st.sidebar.caption(
+                f"Stage cache: {cache_stats['size_bytes'] / 1024 / 1024:.0f} of "
+                f"{cache_stats['max_bytes'] / 1024 / 1024:.0f} MB used"
+            )
+            page_size = st.sidebar.selectbox(
+                "Rows per Page",
+                options=PAGE_SIZE_OPTIONS,
+                index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE),
+            )
+            streaming_mode = st.sidebar.checkbox("Stream the file in chunks", value=False)
+            trace_memory = st.sidebar.checkbox("Trace Memory per Stage", value=False)
+
+            # Stage timings of this run; stages reused from earlier runs are marked cached
+            profile = RunProfile(trace_memory=trace_memory)
+
+            # Parsed data, filtered views and grouped results are cached by upload content
+            # Hashing a large upload takes a while, so it is done once per uploaded file
+            file_id = getattr(uploaded_file, "file_id", None)
+            upload_hash = st.session_state.upload_hash
+            if file_id is None or upload_hash is None or upload_hash[0] != file_id:
+                upload_hash = st.session_state.upload_hash = (file_id, hash_upload(uploaded_file))
+            upload_key = upload_hash[1]
+            if streaming_mode:
+                streaming_engine = st.sidebar.selectbox("Streaming Engine", options=STREAMING_ENGINES)
+                memory_budget_mb = st.sidebar.number_input(
+                    "Memory Budget (MB)", min_value=16, value=DEFAULT_MEMORY_BUDGET_MB, step=16
+                )
+                chunk_rows = stage_cache.get_or_compute(
+                    fingerprint(upload_key, "chunk_rows", memory_budget_mb),
+                    lambda: chunk_rows_for_budget(uploaded_file, memory_budget_mb),
+                )
+                source_key = fingerprint(upload_key, streaming_engine, chunk_rows)
+
+                def load_chunks():
+                    return iter_upload_chunks(uploaded_file, chunk_rows, engine=streaming_engine)
+
+                # Only the first chunk is kept for previewing the data
+                with profile.stage("parse"):
+                    data = stage_cache.get_or_compute(
+                        fingerprint(source_key, "parsed"),
+                        lambda: next(load_chunks(), pd.DataFrame()),
+                    )
+
+                def load_column_stats(column):
+                    return column_stats(load_chunks(), columns=[column])[column]
+
+                memory_report = None
+                group_workers = 1
             else:
-                data = pd.read_excel(uploaded_file)
+                # Compact dtypes let grouping and filtering run on small integer codes
+                compact_dtypes = st.sidebar.checkbox("Compact Column Types", value=True)
+                arrow_strings = st.sidebar.checkbox(
+                    "Arrow-Backed Strings", value=False, disabled=not compact_dtypes
+                )
+                # Large frames can be summed in a process pool; results are identical
+                group_workers = st.sidebar.number_input(
+                    "Group-By Worker Processes", min_value=1, max_value=max(default_workers(), 1), value=1
+                )
+                source_key = fingerprint(upload_key, compact_dtypes, arrow_strings)
+
+                def parse_upload():
+                    parsed = read_upload(uploaded_file)
+                    report = None
+                    if compact_dtypes:
+                        parsed, report = optimize_dtypes(parsed, use_arrow=arrow_strings)
+                    return parsed, report
+
+                with profile.stage("parse") as parse_stage:
+                    data, memory_report = stage_cache.get_or_compute(
+                        fingerprint(source_key, "parsed"), parse_upload
+                    )
+                    parse_stage["rows"] = len(data)
 
-            # Ensure datetime columns are properly converted
-            for col in data.columns:
-                if pd.api.types.is_datetime64_any_dtype(data[col]):
-                    data[col] = pd.to_datetime(data[col])
+                def load_column_stats(column):
+                    return column_stats([data], columns=[column], max_unique_values=None)[column]
 
             # Display the uploaded data
             st.subheader("📂 Uploaded Data")
-            st.dataframe(
-                data.style.set_properties(**{"text-align": "center"}).set_table_styles(
-                    [{"selector": "th", "props": [("text-align", "center")]}]
-                ),
-                use_container_width=True,
-            )
+            if streaming_mode:
+                st.write(f"Showing the first {len(data)} rows ({chunk_rows} rows per chunk)")
+            if memory_report:
+                converted_columns = ", ".join(
+                    f"{col} ({dtype})" for col, dtype in memory_report["converted"].items()
+                )
+                st.write(
+                    f"Memory: {memory_report['before_bytes'] / 1024 ** 2:.1f} MB → "
+                    f"{memory_report['after_bytes'] / 1024 ** 2:.1f} MB"
+                    + (f" | Converted: {converted_columns}" if converted_columns else "")
+                )
+            render_table(data, key="uploaded", page_size=page_size)
 
             chart_type_options = ["bar", "pie", "bubble", "scatter", "line"]
             selected_chart_type = st.sidebar.selectbox(
@@ -57,20 +167,44 @@ def main():
                 index=0  # Default to bar chart
             )
 
-            # Initialize filtered data
-            filtered_data = data.copy()
-
             # Select columns for grouping and aggregation (with None as default values)
             group_column = st.sidebar.selectbox(
                 "📊 Select a Column to Group By",
-                options=[None] + list(filtered_data.columns),
+                options=[None] + list(data.columns),
             )
-            numeric_columns = filtered_data.select_dtypes(include=["number"]).columns
+            numeric_columns = data.select_dtypes(include=["number"]).columns
             agg_column = st.sidebar.selectbox(
                 "🔢 Select a Numeric Column to Analyze",
                 options=[None] + list(numeric_columns),
             )
 
+            # Tolerances used when matching processed values against API values
+            st.sidebar.subheader("🎯 Comparison Tolerance")
+            absolute_tolerance = st.sidebar.number_input(
+                "Absolute Tolerance", min_value=0.0, value=DEFAULT_ATOL, format="%.1e"
+            )
+            relative_tolerance = st.sidebar.number_input(
+                "Relative Tolerance", min_value=0.0, value=DEFAULT_RTOL, format="%.1e"
+            )
+
+            # Payload encoding options for the visualizer API
+            st.sidebar.subheader("📦 API Payload")
+            payload_format = st.sidebar.selectbox("Payload Format", options=PAYLOAD_FORMATS)
+            compress_payload = st.sidebar.checkbox("Compress Payload (gzip)", value=False)
+            project_columns = st.sidebar.checkbox("Only Send Columns Mentioned in the Prompt", value=False)
+            bypass_response_cache = st.sidebar.checkbox(
+                "Bypass Response Cache",
+                value=False,
+                help="Always call the API, even if the same payload was sent before.",
+            )
+            sample_rows = st.sidebar.number_input(
+                "Sample Rows (0 sends all rows)",
+                min_value=0,
+                value=0,
+                step=1000,
+                help="Sampled payloads aggregate differently from the full data; use for smoke checks only.",
+            )
+
             # Dynamic Filters
             st.sidebar.subheader("🔍 Apply Filters")
 
@@ -81,29 +215,43 @@ def main():
                 key="filter_columns_multiselect",
             )
 
-            # Render filter UI for selected columns
+            filter_backend = st.sidebar.selectbox(
+                "Filter Backend",
+                options=FILTER_BACKENDS,
+                help="'query' evaluates all filters as one expression, using numexpr if installed.",
+            )
+
+            # Render filter UI for selected columns and collect the filter spec
+            filter_spec = []
             for filter_column in selected_columns:
                 st.sidebar.subheader(f"Filter: {filter_column}")
+                # Stats are only collected for columns chosen for filtering
+                column_info = stage_cache.get_or_compute(
+                    fingerprint(source_key, "stats", filter_column),
+                    lambda: load_column_stats(filter_column),
+                )
 
                 # Determine column type and render appropriate filter
-                if pd.api.types.is_datetime64_any_dtype(filtered_data[filter_column]):
+                if column_info["kind"] == "date" and column_info["min"] is not None:
                     # Date range filter for datetime columns
-                    min_date = filtered_data[filter_column].min().date()
-                    max_date = filtered_data[filter_column].max().date()
+                    min_date = column_info["min"].date()
+                    max_date = column_info["max"].date()
                     date_range = st.sidebar.date_input(
                         f"Select Date Range for {filter_column}",
                         [min_date, max_date],
                         key=f"date_filter_input_{filter_column}"
                     )
-                    filtered_data = filtered_data[
-                        (filtered_data[filter_column].dt.date >= date_range[0])
-                        & (filtered_data[filter_column].dt.date <= date_range[1])
-                    ]
-
-                elif pd.api.types.is_numeric_dtype(filtered_data[filter_column]):
+                    filter_spec.append({
+                        "column": filter_column,
+                        "kind": "date",
+                        "start": date_range[0],
+                        "end": date_range[1],
+                    })
+
+                elif column_info["kind"] == "range" and column_info["min"] is not None:
                     # Slider for numeric columns
-                    min_val = filtered_data[filter_column].min()
-                    max_val = filtered_data[filter_column].max()
+                    min_val = column_info["min"]
+                    max_val = column_info["max"]
                     numeric_range = st.sidebar.slider(
                         f"Select Range for {filter_column}",
                         min_value=float(min_val),  # Use float to handle decimal values
@@ -111,56 +259,69 @@ def main():
                         value=(float(min_val), float(max_val)),
                         key=f"numeric_filter_slider_{filter_column}"
                     )
-                    filtered_data = filtered_data[
-                        (filtered_data[filter_column] >= numeric_range[0])
-                        & (filtered_data[filter_column] <= numeric_range[1])
-                    ]
-
-                elif pd.api.types.is_string_dtype(filtered_data[filter_column]):
+                    filter_spec.append({
+                        "column": filter_column,
+                        "kind": "range",
+                        "min": numeric_range[0],
+                        "max": numeric_range[1],
+                    })
+
+                elif column_info["kind"] == "values":
                     # Multi-select for categorical columns
-                    unique_values = filtered_data[filter_column].unique()
+                    unique_values = column_info["values"]
                     selected_values = st.sidebar.multiselect(
                         f"Select Values for {filter_column}",
                         options=unique_values,
                         default=unique_values,
                         key=f"categorical_filter_multiselect_{filter_column}"
                     )
-                    filtered_data = filtered_data[
-                        filtered_data[filter_column].isin(selected_values)
-                    ]
+                    # A truncated value list left fully selected keeps every row
+                    if not (column_info["truncated"] and len(selected_values) == len(unique_values)):
+                        filter_spec.append({
+                            "column": filter_column,
+                            "kind": "values",
+                            "values": selected_values,
+                        })
+
+            with profile.stage("filter") as filter_stage:
+                filtered_data = stage_cache.get_or_compute(
+                    fingerprint(source_key, "filtered", filter_spec),
+                    lambda: apply_filter_spec(data, filter_spec, backend=filter_backend),
+                )
+                filter_stage["rows"] = len(filtered_data)
 
             # Display filtered data only if it's different from the original data
-            if not filtered_data.equals(data):
+            if len(filtered_data) != len(data):
                 st.subheader("📂 Filtered Data")
-                st.dataframe(
-                    filtered_data.style.set_properties(
-                        **{"text-align": "center"}
-                    ).set_table_styles(
-                        [{"selector": "th", "props": [("text-align", "center")]}]
-                    ),
-                    use_container_width=True,
-                )
+                render_table(filtered_data, key="filtered", page_size=page_size)
 
                 # Optional: Display the number of rows in original vs filtered data
-                st.write(f"Original Data Rows: {len(data)} | Filtered Data Rows: {len(filtered_data)}")
+                if not streaming_mode:
+                    st.write(f"Original Data Rows: {len(data)} | Filtered Data Rows: {len(filtered_data)}")
 
             # Group data only if both group_column and agg_column are selected
             if group_column and agg_column:
-                # Convert group_column to string to ensure compatibility
-                grouped_data = (
-                    filtered_data.groupby(group_column)[agg_column].sum().reset_index()
-                )
-                grouped_data[group_column] = grouped_data[group_column].astype(str)
+                def group_data():
+                    if streaming_mode:
+                        grouped, filtered_rows = chunked_group_sum(
+                            load_chunks(), group_column, agg_column, filter_spec
+                        )
+                        # Convert group_column to string to ensure compatibility
+                        grouped[group_column] = grouped[group_column].astype(str)
+                    else:
+                        grouped = group_sum(filtered_data, group_column, agg_column, workers=group_workers)
+                        filtered_rows = len(filtered_data)
+                    return grouped, filtered_rows
+
+                grouped_key = fingerprint(source_key, "grouped", filter_spec, group_column, agg_column)
+                with profile.stage("group") as group_stage:
+                    grouped_data, filtered_rows = stage_cache.get_or_compute(grouped_key, group_data)
+                    group_stage["rows"] = len(grouped_data)
+                if streaming_mode:
+                    st.write(f"Filtered Data Rows: {filtered_rows}")
                 st.session_state.grouped_data = grouped_data  # Store in session state
                 st.subheader("📊 Grouped Data")
-                st.dataframe(
-                    grouped_data.style.set_properties(
-                        **{"text-align": "center"}
-                    ).set_table_styles(
-                        [{"selector": "th", "props": [("text-align", "center")]}]
-                    ),
-                    use_container_width=True,
-                )
+                render_table(grouped_data, key="grouped", page_size=page_size)
             else:
                 st.warning(
                     "⚠️ Please select both a column to Group By and a Numeric Column to Analyze."
@@ -194,24 +355,87 @@ def main():
             # Trigger comparison when button is clicked
             if is_compare_ready and compare_button:
                 st.session_state.show_results = True
-                # Reset session state variables
-                st.session_state.api_response = None
-                st.session_state.comparison_table = None
-                st.session_state.comparison_results = None
+                if bypass_response_cache:
+                    # Force a new API call even if its inputs are unchanged
+                    st.session_state.stage_results.pop("api", None)
+
+            # Later stages rerun only when the fingerprint of their inputs changes
+            stage_results = st.session_state.stage_results
 
             # Render results if show_results is True and we have all necessary data
             if st.session_state.show_results and group_column and agg_column:
                 try:
                     st.subheader("🔍 API Results")
 
-                    # Call API only if results haven't been generated
-                    if st.session_state.api_response is None:
-                        # Use stored grouped data for simulated API call
-                        api_response = call_visualizer_api(data, user_prompt, chart_type=selected_chart_type)
-                        st.session_state.api_response = api_response  # Store API response
-
-                    # Use stored API response
-                    api_response = st.session_state.api_response
+                    def call_api():
+                        # The API needs the full dataset, so streaming mode loads it, but only
+                        # if its serialized form is not cached; the preview has the same columns
+                        api_input = (lambda: read_upload(uploaded_file)) if streaming_mode else data
+                        payload_columns = None
+                        if project_columns:
+                            # Always keep the columns the expected result depends on
+                            required_columns = [group_column, agg_column] + list(selected_columns)
+                            payload_columns = [
+                                col for col in data.columns
+                                if col in columns_in_prompt(data, user_prompt) or col in required_columns
+                            ]
+                        # The serialized dataset is reused when only the prompt or chart type changed
+                        return call_visualizer_api(
+                            api_input,
+                            user_prompt,
+                            chart_type=selected_chart_type,
+                            payload_format=payload_format,
+                            compress=compress_payload,
+                            columns=payload_columns,
+                            sample_rows=sample_rows or None,
+                            use_cache=not bypass_response_cache,
+                            data_key=fingerprint(source_key, "api_input"),
+                        )
+
+                    # The API is called on Compare, and only if its inputs changed since the last call
+                    rerun_stages = []
+                    api_called = False
+                    if compare_button or "api" not in stage_results:
+                        api_key = fingerprint(
+                            source_key, user_prompt, selected_chart_type, payload_format, compress_payload,
+                            project_columns, group_column, agg_column, selected_columns, sample_rows,
+                        )
+                        _, api_called = run_stage(stage_results, "api", api_key, call_api)
+                        if api_called:
+                            rerun_stages.append("api")
+                    api_key, api_response = stage_results["api"]
+                    st.session_state.api_response = api_response
+
+                    payload_metrics = st.session_state.payload_metrics
+                    if not api_called:
+                        profile.record("api", cached=True, seconds=0)
+                    elif payload_metrics:
+                        profile.record(
+                            "payload",
+                            seconds=payload_metrics["build_seconds"] + payload_metrics["serialization_seconds"],
+                            payload_bytes=payload_metrics["payload_bytes"],
+                            body_bytes=payload_metrics["body_bytes"],
+                        )
+                        if "request_seconds" in payload_metrics:
+                            profile.record(
+                                "api",
+                                seconds=payload_metrics["request_seconds"],
+                                cache_hit=bool(payload_metrics.get("cache_hit")),
+                            )
+                    if payload_metrics:
+                        st.write(
+                            f"Payload: {payload_metrics['payload_bytes']:,} bytes "
+                            f"({payload_metrics['body_bytes']:,} sent) | "
+                            f"Build: {payload_metrics['build_seconds']:.3f}s | "
+                            f"Serialization: {payload_metrics['serialization_seconds']:.3f}s"
+                            + (
+                                f" | Request: {payload_metrics['request_seconds']:.3f}s"
+                                if "request_seconds" in payload_metrics else ""
+                            )
+                            + (" | Served from response cache" if payload_metrics.get("cache_hit") else "")
+                        )
+                        with st.expander("⏱️ API Latency Histogram"):
+                            st.json(visualizer_client.latency_histogram())
 
                     # Convert API response labels to string to ensure compatibility
                     api_data = pd.DataFrame(
@@ -219,72 +443,105 @@ def main():
                         columns=["AggregatedValue"],
                     )
                     api_data[group_column] = [str(label) for label in api_response["chartConfig"]["data"]["labels"]]
-                    st.dataframe(api_data.style.set_properties(**{'text-align': 'center'}).set_table_styles(
-                            [{'selector': 'th', 'props': [('text-align', 'center')]}]), use_container_width=True)
+                    render_table(api_data, key="api", page_size=page_size)
 
                     st.subheader("📋 Comparison Table")
-                    # Regenerate comparison table only if not already generated
-                    if st.session_state.comparison_table is None:
-                        # Reset the index to ensure matching merge keys
-                        grouped_data_reset = st.session_state.grouped_data.reset_index(drop=True)
-                        api_data_reset = api_data.reset_index(drop=True)
-
-                        # Merge with how='outer' to include all rows
-                        comparison_table = pd.concat([grouped_data_reset, api_data_reset], axis=1)
-
-                        # Rename columns to handle potential conflicts
-                        comparison_table.columns = [
-                            f"{col}_processed" if i < len(grouped_data_reset.columns)
-                            else col
-                            for i, col in enumerate(comparison_table.columns)
-                        ]
-
-                        st.session_state.comparison_table = comparison_table  # Store comparison table
-
-                    # Use stored comparison table
-                    comparison_table = st.session_state.comparison_table
-
-                    # Generate comparison results if not already done
-                    if 'comparison_results' not in st.session_state or st.session_state.comparison_results is None:
-                        # Compare processed data with simulated API data
-                        comparison_results = {"comparisons": []}
-                        processed_group_col = f"{group_column}_processed"
-                        processed_agg_col = f"{agg_column}_processed"
-
-                        for idx, row in comparison_table.iterrows():
-                            comp = {
-                                "processed_label": row[processed_group_col] if pd.notna(row[processed_group_col]) else "N/A",
-                                "processed_value": row[processed_agg_col] if pd.notna(row[processed_agg_col]) else 0,
-                                "api_label": row[group_column] if pd.notna(row[group_column]) else "N/A",
-                                "api_value": row["AggregatedValue"] if pd.notna(row["AggregatedValue"]) else 0,
-                                "label_match": str(row[processed_group_col]) == str(row[group_column]) if pd.notna(row[processed_group_col]) and pd.notna(row[group_column]) else False,
-                                "value_match": abs(row[processed_agg_col] - row["AggregatedValue"]) < 1e-10 if pd.notna(row[processed_agg_col]) and pd.notna(row["AggregatedValue"]) else False
-                            }
-                            comparison_results["comparisons"].append(comp)
-
-                        # Store comparison results in session state for logging
-                        st.session_state.comparison_results = comparison_results
-
-                    # Add a column to indicate pass/fail with icons
-                    comparison_table["Test_Result"] = comparison_table.apply(
-                        lambda row: "✅" if abs(row[f"{agg_column}_processed"] - row["AggregatedValue"]) < 1e-10 else "❌",
-                        axis=1
+
+                    def compare():
+                        # Join processed data with API data on the group label
+                        with profile.stage("compare") as compare_stage:
+                            comparison = join_results(
+                                grouped_data[group_column],
+                                grouped_data[agg_column],
+                                api_data[group_column],
+                                api_data["AggregatedValue"],
+                                atol=absolute_tolerance,
+                                rtol=relative_tolerance,
+                            )
+                            compare_stage["rows"] = len(comparison)
+                        return comparison
+
+                    # Regenerate comparison results only if the grouping, response or tolerances changed
+                    comparison_results, compared = run_stage(
+                        stage_results,
+                        "compare",
+                        fingerprint(grouped_key, api_key, absolute_tolerance, relative_tolerance),
+                        compare,
                     )
-                    st.dataframe(comparison_table.style.set_properties(**{'text-align': 'center'}).set_table_styles(
-                        [{'selector': 'th', 'props': [('text-align', 'center')]}]), use_container_width=True)
+                    if compared:
+                        rerun_stages.append("compare")
+                    else:
+                        profile.record("compare", cached=True, seconds=0)
+                    st.session_state.comparison_results = comparison_results
+
+                    # Build the comparison table with a pass/fail column
+                    comparison_table = pd.DataFrame({
+                        f"{group_column}_processed": comparison_results["processed_label"],
+                        f"{agg_column}_processed": comparison_results["processed_value"],
+                        group_column: comparison_results["api_label"],
+                        "AggregatedValue": comparison_results["api_value"],
+                        "Join_Status": comparison_results["join_status"],
+                        "Test_Result": np.where(comparison_results["value_match"].to_numpy(), "✅", "❌"),
+                    })
+                    render_table(comparison_table, key="comparison", page_size=page_size)
 
                     # Determine overall test status
-                    test_status = "Passed" if all(comp['value_match'] for comp in st.session_state.comparison_results['comparisons']) else "Failed"
+                    comparison_summary = summarize_comparison(comparison_results)
+                    test_status = comparison_summary["status"]
+                    st.write(
+                        f"Matched Labels: {comparison_summary['matched']} | "
+                        f"Missing in API: {comparison_summary['missing_in_api']} | "
+                        f"Extra in API: {comparison_summary['extra_in_api']}"
+                    )
 
-                    # Determine next test case ID
-                    try:
-                        existing_logs = pd.read_csv("VisualizerTests.csv")
-                        next_test_no = existing_logs['Test Case ID'].max() + 1 if not existing_logs.empty else 1
-                    except FileNotFoundError:
-                        next_test_no = 1
+                    # Check the response against the aggregations, group keys and filters it declares
+                    st.subheader("🧭 Plan Validation")
+                    if streaming_mode:
+                        st.info("Plan validation needs the full dataset and is skipped in streaming mode.")
+                    else:
+                        def check_plan():
+                            with profile.stage("plan_validation"):
+                                try:
+                                    result = validate_plan(
+                                        data, api_response, atol=absolute_tolerance, rtol=relative_tolerance
+                                    )
+                                except (KeyError, TypeError, ValueError) as e:
+                                    result = {"error": str(e)}
+                            return result
+
+                        plan_validation, validated = run_stage(
+                            stage_results,
+                            "plan_validation",
+                            fingerprint(source_key, api_key, absolute_tolerance, relative_tolerance),
+                            check_plan,
+                        )
+                        if validated:
+                            rerun_stages.append("plan_validation")
+                        else:
+                            profile.record("plan_validation", cached=True, seconds=0)
+                        st.session_state.plan_validation = plan_validation
+                        if "error" in plan_validation:
+                            st.warning(f"⚠️ Could not validate the API plan: {plan_validation['error']}")
+                        else:
+                            st.write(generate_test_case_name(api_response.get("dataProcessing", {})))
+                            render_table(plan_validation["expected"], key="plan", page_size=page_size)
+                            for result_column, plan_comparison in plan_validation["comparisons"].items():
+                                plan_summary = summarize_comparison(plan_comparison)
+                                st.write(
+                                    f"{result_column}: {plan_summary['status']} | "
+                                    f"Value Mismatches: {plan_summary['value_mismatches']} | "
+                                    f"Missing in API: {plan_summary['missing_in_api']} | "
+                                    f"Extra in API: {plan_summary['extra_in_api']}"
+                                )
+                            st.write(f"Plan Validation Status: {plan_validation['status']}")
+
+                    st.caption(
+                        "Stages rerun: " + (", ".join(rerun_stages) if rerun_stages else "none (inputs unchanged)")
+                    )
 
                     # Submit button for logging
                     log_test_case_button = st.button("🔖 Log Test Case")
+                    attach_profile = st.checkbox("Attach Run Profile to Logged Test Case", value=False)
 
                     # Check if Test Case Description is empty
                     if log_test_case_button:
@@ -293,14 +550,17 @@ def main():
                         else:
                             try:
                                 # Log the test result
-                                result = log_test_result(
-                                    next_test_no,
-                                    st.session_state.test_case_description,
-                                    generate_test_case_name(api_response['dataProcessing']),
-                                    st.session_state.grouped_data,
-                                    st.session_state.api_response,
-                                    test_status
-                                )
+                                # The test case ID is allocated atomically when logging
+                                with profile.stage("log"):
+                                    result = log_test_result(
+                                        None,
+                                        st.session_state.test_case_description,
+                                        generate_test_case_name(api_response['dataProcessing']),
+                                        st.session_state.grouped_data,
+                                        st.session_state.api_response,
+                                        test_status,
+                                        profile=profile if attach_profile else None,
+                                    )
                                 if result:
                                     st.success(result)
                             except Exception as e:
@@ -309,6 +569,18 @@ def main():
                 except Exception as e:
                     st.error(f"Error processing results: {e}")
 
+            # Per-stage timings, row and byte counts and peak memory of this run
+            with st.expander("⏱️ Run Profile"):
+                st.dataframe(pd.DataFrame.from_dict(profile.to_dict(), orient="index"), use_container_width=True)
+                st.download_button(
+                    "Download Profile (JSON)", profile.to_json(), file_name="run_profile.json",
+                    mime="application/json",
+                )
+                st.download_button(
+                    "Download Profile (Prometheus)", profile.to_prometheus(), file_name="run_profile.prom",
+                    mime="text/plain",
+                )
+
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
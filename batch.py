@@ -0,0 +1,251 @@
+"""
+Headless batch runner that replays a suite of test cases against the visualizer API.
+
+Usage:
+    python batch.py suite.json [--workers 8] [--log-file VisualizerTests.db] [--no-log] [--no-cache]
+                               [--group-workers 4]
+
+The suite is a JSON list (or JSON Lines file) of test cases:
+    {
+        "dataset": "data/tasks.csv",
+        "prompt": "Generate a bar chart of days required per task",
+        "chart_type": "bar",
+        "group_column": "Task Name",
+        "agg_column": "Days Required",
+        "filters": [{"column": "Status", "kind": "values", "values": ["Open"]}],
+        "description": "Days per open task"
+    }
+
+Cases without "group_column" and "agg_column" are checked against the plan
+the API declares in its dataProcessing section instead.
+"""
+import argparse
+import datetime
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from requests.exceptions import RequestException
+
+from cache import fingerprint
+from comparison import DEFAULT_ATOL, DEFAULT_RTOL, join_results, summarize_comparison
+from filters import apply_filter_spec
+from ingestion import group_sum, read_upload
+from log_store import DEFAULT_LOG_PATH
+from plan import validate_plan
+from utils import generate_test_case_name, log_test_result, request_chart
+
+DEFAULT_WORKERS = 8
+
+
+def load_suite(suite_path):
+    """
+    Load test cases from a JSON list or a JSON Lines file.
+    """
+    with open(suite_path, encoding="utf-8") as suite_file:
+        content = suite_file.read().strip()
+    if content.startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def _parse_filters(filters):
+    # Date filters are written as ISO strings in the suite file
+    parsed = []
+    for filter_condition in filters or []:
+        filter_condition = dict(filter_condition)
+        if filter_condition["kind"] == "date":
+            filter_condition["start"] = datetime.date.fromisoformat(str(filter_condition["start"]))
+            filter_condition["end"] = datetime.date.fromisoformat(str(filter_condition["end"]))
+        parsed.append(filter_condition)
+    return parsed
+
+
+def _error_result(error, response=None, expected=None):
+    return {"response": response, "expected": expected, "comparison": None, "status": "Error", "error": error}
+
+
+def _with_date_columns(data, filter_spec):
+    # CSV datasets keep dates as text; date filters need them as datetimes
+    date_columns = {
+        filter_condition["column"] for filter_condition in filter_spec
+        if filter_condition["kind"] == "date"
+        and not pd.api.types.is_datetime64_any_dtype(data[filter_condition["column"]])
+    }
+    if not date_columns:
+        return data
+    return data.assign(**{col: pd.to_datetime(data[col]) for col in date_columns})
+
+
+def prepare_case(case, datasets, group_workers=1):
+    """
+    Load the case's dataset (once per path) and compute its expected grouping.
+
+    The expected grouping is None for cases validated against the API plan.
+    With group_workers > 1, large groupings are computed in a process pool.
+
+    Returns:
+        tuple: (data, expected grouping, error message or None); a case that
+            cannot be prepared has no data and an error message
+    """
+    try:
+        dataset_path = case["dataset"]
+        if dataset_path not in datasets:
+            with open(dataset_path, "rb") as dataset_file:
+                datasets[dataset_path] = read_upload(dataset_file)
+        data = datasets[dataset_path]
+
+        if "group_column" not in case:
+            return data, None, None
+
+        filter_spec = _parse_filters(case.get("filters"))
+        filtered_data = apply_filter_spec(_with_date_columns(data, filter_spec), filter_spec)
+        expected = group_sum(filtered_data, case["group_column"], case["agg_column"], workers=group_workers)
+    except (OSError, KeyError, TypeError, ValueError) as e:
+        return None, None, f"Could not prepare case: {e}"
+    return data, expected, None
+
+
+def run_case(case, data, expected, atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL, use_cache=True):
+    """
+    Call the API for one case and compare its result with the expected grouping,
+    or with the API's own plan if there is no expected grouping.
+
+    Returns:
+        dict: The API response, expected result, comparison, status and any error
+    """
+    try:
+        # Datasets are loaded once per path, so cases sharing one reuse its serialized form
+        response = request_chart(
+            data,
+            case["prompt"],
+            chart_type=case.get("chart_type", "bar"),
+            use_cache=use_cache,
+            data_key=fingerprint(case["dataset"]),
+        )
+    except (RequestException, ValueError) as e:
+        return _error_result(str(e), expected=expected)
+
+    if expected is None:
+        try:
+            plan_validation = validate_plan(data, response, atol=atol, rtol=rtol)
+        except (KeyError, TypeError, ValueError) as e:
+            return _error_result(f"Invalid plan: {e}", response=response)
+        comparisons = list(plan_validation["comparisons"].values())
+        return {
+            "response": response,
+            "expected": plan_validation["expected"],
+            "comparison": pd.concat(comparisons, ignore_index=True) if comparisons else None,
+            "status": plan_validation["status"],
+            "error": None,
+        }
+
+    try:
+        chart_data = response["chartConfig"]["data"]
+        comparison = join_results(
+            expected[case["group_column"]],
+            expected[case["agg_column"]],
+            chart_data["labels"],
+            chart_data["datasets"][0]["data"],
+            atol=atol,
+            rtol=rtol,
+        )
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        return _error_result(f"Invalid response: {e!r}", response=response, expected=expected)
+    return {
+        "response": response,
+        "expected": expected,
+        "comparison": comparison,
+        "status": summarize_comparison(comparison)["status"],
+        "error": None,
+    }
+
+
+def run_suite(cases, workers=DEFAULT_WORKERS, log_file=DEFAULT_LOG_PATH, log=True,
+              atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL, use_cache=True, group_workers=1):
+    """
+    Replay every case concurrently and log the results in suite order.
+
+    Returns:
+        list: One result dict per case, with its index and status added
+    """
+    # Expected results are computed up front so worker threads only wait on the network
+    datasets = {}
+    prepared = [prepare_case(case, datasets, group_workers) for case in cases]
+
+    results = [None] * len(cases)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for index, (case, (data, expected, error)) in enumerate(zip(cases, prepared)):
+            if error is not None:
+                results[index] = _error_result(error)
+                results[index]["index"] = index
+                print(f"[{index + 1}/{len(cases)}] Error: {case.get('prompt')}")
+            else:
+                futures[executor.submit(run_case, case, data, expected, atol, rtol, use_cache)] = index
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # One broken case must not abort the rest of the suite
+                result = _error_result(f"Unexpected error: {e!r}")
+            result["index"] = index
+            results[index] = result
+            print(f"[{index + 1}/{len(cases)}] {result['status']}: {cases[index].get('prompt')}")
+
+    if log:
+        # Logging happens in suite order so test case IDs follow the suite
+        for case, result in zip(cases, results):
+            if result["response"] is None:
+                continue
+            log_test_result(
+                None,
+                case.get("description", case.get("prompt")),
+                generate_test_case_name(result["response"].get("dataProcessing", {})),
+                result["expected"],
+                result["response"],
+                result["status"],
+                file_path=log_file,
+                comparison_results=result["comparison"],
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a suite of visualizer test cases.")
+    parser.add_argument("suite", help="JSON or JSON Lines file with the test cases")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent API calls")
+    parser.add_argument("--log-file", default=DEFAULT_LOG_PATH, help="Test log database to append to")
+    parser.add_argument("--no-log", action="store_true", help="Do not log the results")
+    parser.add_argument("--atol", type=float, default=DEFAULT_ATOL, help="Absolute tolerance")
+    parser.add_argument("--rtol", type=float, default=DEFAULT_RTOL, help="Relative tolerance")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the API response cache")
+    parser.add_argument("--group-workers", type=int, default=1, help="Processes for large group-bys")
+    args = parser.parse_args(argv)
+
+    cases = load_suite(args.suite)
+    results = run_suite(
+        cases,
+        workers=args.workers,
+        log_file=args.log_file,
+        log=not args.no_log,
+        atol=args.atol,
+        rtol=args.rtol,
+        use_cache=not args.no_cache,
+        group_workers=args.group_workers,
+    )
+
+    passed = sum(result["status"] == "Passed" for result in results)
+    failed = sum(result["status"] == "Failed" for result in results)
+    errors = len(results) - passed - failed
+    print(f"Passed: {passed} | Failed: {failed} | Errors: {errors}")
+    for result in results:
+        if result["error"]:
+            print(f"Error in case {result['index'] + 1}: {result['error']}")
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""
+Benchmark of the validation pipeline on synthetic datasets.
+
+Usage:
+    python benchmark.py [--rows 10000 100000 1000000] [--categorical-columns 2]
+                        [--numeric-columns 2] [--cardinality 100] [--repeat 3]
+                        [--payload-format records] [--compress] [--group-workers 4]
+                        [--label v1.2] [--output benchmark.json] [--baseline previous.json]
+
+Each dataset size runs the stages of a validation run: ingestion of a CSV
+upload, dtype compaction, filtering, grouping, building and sending the API
+payload to a local stub server, comparison and logging. The output is a JSON
+document with the best and median time of every stage per dataset size and
+the stage's peak memory, traced in one extra run so that tracing does not
+slow the timed runs; with --baseline the times are compared with an earlier
+output file.
+"""
+import argparse
+import datetime
+import gzip
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from api_client import ApiClient
+from comparison import join_results, summarize_comparison
+from filters import apply_filter_spec
+from ingestion import group_sum, optimize_dtypes, read_upload
+from profiling import RunProfile
+from response_cache import ResponseCache
+from utils import log_test_result, request_chart
+
+DEFAULT_ROWS = [10_000, 100_000]
+DEFAULT_REPEAT = 3
+
+# Columns the stub server aggregates, present in every synthetic dataset
+GROUP_COLUMN = "category_0"
+VALUE_COLUMN = "value_0"
+
+BENCHMARK_PROMPT = f"Generate a bar chart of the sum of {VALUE_COLUMN} per {GROUP_COLUMN}"
+
+
+def generate_dataset(rows, categorical_columns=2, numeric_columns=2, cardinality=100, seed=0):
+    """
+    Generate a synthetic dataset with text, integer and date columns.
+
+    Args:
+        rows (int): Number of rows
+        categorical_columns (int): Number of text columns, named category_<i>
+        numeric_columns (int): Number of integer columns, named value_<i>
+        cardinality (int): Distinct values per text column
+        seed (int): Random seed, so runs on different versions see the same data
+
+    Returns:
+        pd.DataFrame: The dataset
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.array([f"c{i:06d}" for i in range(cardinality)], dtype=object)
+    columns = {}
+    for i in range(max(categorical_columns, 1)):
+        columns[f"category_{i}"] = labels[rng.integers(0, cardinality, rows)]
+    for i in range(max(numeric_columns, 1)):
+        columns[f"value_{i}"] = rng.integers(0, 1000, rows)
+    columns["date"] = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")
+    return pd.DataFrame(columns)
+
+
+def benchmark_filter_spec(data):
+    """
+    Filters used by the benchmark: half of the groups and the middle of the value range.
+    """
+    text_column = "category_1" if "category_1" in data.columns else GROUP_COLUMN
+    values = sorted(data[text_column].unique())
+    return [
+        {"column": text_column, "kind": "values", "values": values[: max(len(values) // 2, 1)]},
+        {"column": VALUE_COLUMN, "kind": "range", "min": 100, "max": 900},
+    ]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # Answers like the visualizer API: the sum of VALUE_COLUMN per GROUP_COLUMN
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+        if payload.get("dataFormat") == "columnar":
+            data = pd.DataFrame(dict(zip(payload["data"]["columns"], payload["data"]["values"])))
+        else:
+            data = pd.DataFrame.from_records(payload["data"])
+        grouped = data.groupby(GROUP_COLUMN)[VALUE_COLUMN].sum()
+        response = json.dumps({
+            "chartConfig": {"data": {
+                "labels": [str(label) for label in grouped.index],
+                "datasets": [{"data": [int(value) for value in grouped.to_numpy()]}],
+            }},
+            "dataProcessing": {"aggregation": "sum", "groupBy": GROUP_COLUMN, "valueField": VALUE_COLUMN},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+
+def start_stub_server():
+    """
+    Start a local stand-in for the visualizer API on a free port.
+
+    Returns:
+        tuple: (server, URL); call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/visualize"
+
+
+def run_pipeline(upload, url, work_dir, payload_format="records", compress=False, group_workers=1,
+                 trace_memory=False):
+    """
+    Run every stage of one validation run and profile it.
+
+    The filtered data is sent to the stub server, so its answer matches the
+    locally grouped result when the pipeline is correct.
+
+    Args:
+        upload (io.BytesIO): CSV upload with a name attribute
+        url (str): Endpoint of the stub server
+        work_dir (str): Directory for the response cache and the test log
+        group_workers (int): Processes for the group-by of large frames
+        trace_memory (bool): Measure the peak memory of each stage with tracemalloc
+
+    Returns:
+        tuple: (RunProfile, comparison status)
+    """
+    profile = RunProfile(trace_memory=trace_memory)
+    with profile.stage("ingest") as stage:
+        data = read_upload(upload)
+        stage["rows"] = len(data)
+    with profile.stage("optimize_dtypes") as stage:
+        data, memory_report = optimize_dtypes(data)
+        stage["bytes_before"] = memory_report["before_bytes"]
+        stage["bytes_after"] = memory_report["after_bytes"]
+    with profile.stage("filter") as stage:
+        filtered_data = apply_filter_spec(data, benchmark_filter_spec(data))
+        stage["rows"] = len(filtered_data)
+    with profile.stage("group") as stage:
+        grouped_data = group_sum(filtered_data, GROUP_COLUMN, VALUE_COLUMN, workers=group_workers)
+        stage["rows"] = len(grouped_data)
+
+    # A fresh client and cache keep connection reuse and cached answers out of the timings
+    metrics = {}
+    response = request_chart(
+        filtered_data,
+        BENCHMARK_PROMPT,
+        payload_format=payload_format,
+        compress=compress,
+        client=ApiClient(),
+        metrics=metrics,
+        use_cache=False,
+        cache=ResponseCache(directory=os.path.join(work_dir, "responses")),
+        url=url,
+    )
+    profile.record(
+        "payload",
+        seconds=metrics["build_seconds"] + metrics["serialization_seconds"],
+        payload_bytes=metrics["payload_bytes"],
+        body_bytes=metrics["body_bytes"],
+    )
+    profile.record("api", seconds=metrics["request_seconds"])
+
+    with profile.stage("compare") as stage:
+        chart_data = response["chartConfig"]["data"]
+        comparison = join_results(
+            grouped_data[GROUP_COLUMN],
+            grouped_data[VALUE_COLUMN],
+            chart_data["labels"],
+            chart_data["datasets"][0]["data"],
+        )
+        status = summarize_comparison(comparison)["status"]
+        stage["rows"] = len(comparison)
+    with profile.stage("log"):
+        log_test_result(
+            None,
+            "Benchmark run",
+            "Aggregating by sum",
+            grouped_data,
+            response,
+            status,
+            file_path=os.path.join(work_dir, "benchmark.db"),
+            comparison_results=comparison,
+        )
+    return profile, status
+
+
+def _summarize_stages(profiles, memory_profile):
+    # Best and median time per stage; the other values are taken from the last
+    # run, except the peak memory, which comes from the traced run
+    stages = {}
+    for name in profiles[0].to_dict():
+        seconds = [profile.stages[name]["seconds"] for profile in profiles]
+        entry = {key: value for key, value in profiles[-1].stages[name].items() if key != "seconds"}
+        entry["peak_memory_bytes"] = memory_profile.stages.get(name, {}).get("peak_memory_bytes")
+        entry["seconds_min"] = min(seconds)
+        entry["seconds_median"] = statistics.median(seconds)
+        stages[name] = entry
+    return stages
+
+
+def run_benchmark(rows_list=DEFAULT_ROWS, categorical_columns=2, numeric_columns=2, cardinality=100,
+                  repeat=DEFAULT_REPEAT, payload_format="records", compress=False, group_workers=1,
+                  label=None):
+    """
+    Benchmark the pipeline for every dataset size.
+
+    Returns:
+        dict: Run metadata and one result per dataset size with per-stage timings
+    """
+    server, url = start_stub_server()
+    results = []
+    try:
+        for rows in rows_list:
+            data = generate_dataset(rows, categorical_columns, numeric_columns, cardinality)
+            upload = io.BytesIO(data.to_csv(index=False).encode("utf-8"))
+            upload.name = "benchmark.csv"
+
+            profiles = []
+            statuses = set()
+            for _ in range(repeat):
+                with tempfile.TemporaryDirectory() as work_dir:
+                    profile, status = run_pipeline(
+                        upload, url, work_dir, payload_format, compress, group_workers
+                    )
+                profiles.append(profile)
+                statuses.add(status)
+            # The process-wide peak only grows, so per-stage peaks are traced separately
+            with tempfile.TemporaryDirectory() as work_dir:
+                memory_profile, _ = run_pipeline(
+                    upload, url, work_dir, payload_format, compress, group_workers, trace_memory=True
+                )
+
+            result = {
+                "rows": rows,
+                "categorical_columns": categorical_columns,
+                "numeric_columns": numeric_columns,
+                "cardinality": cardinality,
+                "payload_format": payload_format,
+                "compress": compress,
+                "group_workers": group_workers,
+                "repeat": repeat,
+                "status": "Passed" if statuses == {"Passed"} else "Failed",
+                "stages": _summarize_stages(profiles, memory_profile),
+            }
+            total = sum(stage["seconds_min"] for stage in result["stages"].values())
+            print(f"{rows:>12,} rows: {total:.3f}s ({result['status']})")
+            results.append(result)
+    finally:
+        server.shutdown()
+
+    return {
+        "label": label,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare_benchmarks(baseline, current):
+    """
+    Compare the best stage times of two benchmark outputs for the dataset sizes they share.
+
+    Returns:
+        list of dict: rows, stage, baseline and current seconds and their ratio
+    """
+    baseline_results = {result["rows"]: result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        if result["rows"] not in baseline_results:
+            continue
+        baseline_stages = baseline_results[result["rows"]]["stages"]
+        for name, stage in result["stages"].items():
+            if name not in baseline_stages:
+                continue
+            baseline_seconds = baseline_stages[name]["seconds_min"]
+            comparisons.append({
+                "rows": result["rows"],
+                "stage": name,
+                "baseline_seconds": baseline_seconds,
+                "current_seconds": stage["seconds_min"],
+                "ratio": stage["seconds_min"] / baseline_seconds if baseline_seconds else None,
+            })
+    return comparisons
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the validation pipeline on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="Dataset sizes")
+    parser.add_argument("--categorical-columns", type=int, default=2, help="Text columns per dataset")
+    parser.add_argument("--numeric-columns", type=int, default=2, help="Integer columns per dataset")
+    parser.add_argument("--cardinality", type=int, default=100, help="Distinct values per text column")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per dataset size")
+    parser.add_argument("--payload-format", choices=["records", "columnar"], default="records")
+    parser.add_argument("--compress", action="store_true", help="Gzip the request body")
+    parser.add_argument("--group-workers", type=int, default=1, help="Processes for large group-bys")
+    parser.add_argument("--label", help="Name of the measured version, stored in the output")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier output file to compare with")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.rows,
+        categorical_columns=args.categorical_columns,
+        numeric_columns=args.numeric_columns,
+        cardinality=args.cardinality,
+        repeat=args.repeat,
+        payload_format=args.payload_format,
+        compress=args.compress,
+        group_workers=args.group_workers,
+        label=args.label,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        for comparison in compare_benchmarks(baseline, report):
+            ratio = f"{comparison['ratio']:.2f}x" if comparison["ratio"] is not None else "n/a"
+            print(
+                f"{comparison['rows']:>12,} rows {comparison['stage']:<16} "
+                f"{comparison['baseline_seconds']:.4f}s -> {comparison['current_seconds']:.4f}s ({ratio})"
+            )
+    return 0 if all(result["status"] == "Passed" for result in report["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Size limit of the shared stage cache, in megabytes; one setting for the whole server
+DEFAULT_CACHE_SIZE_MB = int(os.environ.get("VISUALIZER_STAGE_CACHE_MB", 512))
+
+
+def hash_upload(uploaded_file, block_size=1 << 20):
+    """
+    Hash the content of an uploaded file.
+
+    Args:
+        uploaded_file: File-like object
+        block_size (int): Number of bytes hashed per read
+
+    Returns:
+        str: Hex digest identifying the file content
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if hasattr(uploaded_file, "getbuffer"):
+        digest.update(uploaded_file.getbuffer())
+    else:
+        uploaded_file.seek(0)
+        for block in iter(lambda: uploaded_file.read(block_size), b""):
+            digest.update(block)
+        uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def fingerprint(*parts):
+    """
+    Build a stable key from JSON-compatible parts (dates and other values are stringified).
+    """
+    encoded = json.dumps(parts, default=str, sort_keys=True).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _measure(value, frames, seen):
+    """
+    Add up the memory of value outside pandas objects, collecting those in frames.
+
+    Containers are measured deeply; an object reached twice is counted once.
+    """
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frames[id(value)] = value
+        return 0
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_measure(key, frames, seen) + _measure(item, frames, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_measure(item, frames, seen) for item in value)
+    return size
+
+
+def _frame_size(frame):
+    if isinstance(frame, pd.DataFrame):
+        return int(frame.memory_usage(deep=True).sum())
+    return int(frame.memory_usage(deep=True))
+
+
+def estimate_size(value):
+    """
+    Estimate the memory held by a cached value, in bytes.
+
+    Nested dicts, lists and tuples are measured deeply, and objects
+    referenced more than once are counted once.
+    """
+    frames = {}
+    size = _measure(value, frames, set())
+    return size + sum(_frame_size(frame) for frame in frames.values())
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by the estimated size of its values.
+
+    DataFrames and Series are counted once however many entries hold them,
+    e.g. a filtered view that is the unfiltered frame itself.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (value, bytes outside pandas objects, ids of the pandas objects it holds)
+        self._entries = OrderedDict()
+        # id -> [pandas object, bytes, number of entries holding it]
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def _remove(self, key):
+        # Caller holds the lock
+        _, own_bytes, frame_ids = self._entries.pop(key)
+        self.current_bytes -= own_bytes
+        for frame_id in frame_ids:
+            frame_entry = self._frames[frame_id]
+            frame_entry[2] -= 1
+            if frame_entry[2] == 0:
+                self.current_bytes -= frame_entry[1]
+                del self._frames[frame_id]
+
+    def _evict(self):
+        # Caller holds the lock
+        while self.current_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def put(self, key, value):
+        frames = {}
+        own_bytes = _measure(value, frames, set())
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            new_frames = {frame_id: frame for frame_id, frame in frames.items() if frame_id not in self._frames}
+            frame_sizes = {frame_id: _frame_size(frame) for frame_id, frame in new_frames.items()}
+            if own_bytes + sum(frame_sizes.values()) > self.max_bytes:
+                # Values larger than the whole cache are never stored
+                return value
+            for frame_id, frame in frames.items():
+                if frame_id in new_frames:
+                    self._frames[frame_id] = [frame, frame_sizes[frame_id], 1]
+                    self.current_bytes += frame_sizes[frame_id]
+                else:
+                    self._frames[frame_id][2] += 1
+            self._entries[key] = (value, own_bytes, list(frames))
+            self.current_bytes += own_bytes
+            self._evict()
+        return value
+
+    def resize(self, max_bytes):
+        """
+        Change the size limit, evicting least recently used entries right away.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._frames.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Shared across Streamlit reruns, since imported modules are not re-executed
+stage_cache = LRUCache()
+
+
+def run_stage(results, name, key, compute):
+    """
+    Rerun a pipeline stage only when the fingerprint of its inputs changes.
+
+    Unlike stage_cache, results holds one entry per stage name, such as an
+    API response in a user's session, and the latest result replaces the
+    previous one instead of being shared or evicted.
+
+    Args:
+        results (dict): Stage name -> (input fingerprint, result)
+        name (str): Stage name
+        key (str): Fingerprint of the stage's inputs, including upstream stage keys
+        compute (callable): Produces the result when the inputs changed
+
+    Returns:
+        tuple: (result, whether it was recomputed)
+    """
+    stored = results.get(name)
+    if stored is not None and stored[0] == key:
+        return stored[1], False
+    value = compute()
+    results[name] = (key, value)
+    return value, True
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+# Default tolerances used when comparing processed values against API values
+DEFAULT_ATOL = 1e-10
+DEFAULT_RTOL = 0.0
+
+
+def _pad(values, length, fill):
+    """
+    Pad a 1-D array to the requested length with a fill value.
+    """
+    if len(values) >= length:
+        return values
+    padding = np.full(length - len(values), fill, dtype=values.dtype)
+    return np.concatenate([values, padding])
+
+
+def _take(values, positions, fill):
+    """
+    Take values at the given positions, using a fill value where the position is -1.
+    """
+    result = np.full(len(positions), fill, dtype=values.dtype)
+    found = positions >= 0
+    result[found] = values[positions[found]]
+    return result
+
+
+def _as_labels(labels):
+    """
+    Convert labels to an object array of strings, keeping missing labels as None.
+    """
+    labels = pd.Series(labels, dtype=object)
+    missing = labels.isna().to_numpy()
+    result = labels.astype(str).to_numpy(dtype=object)
+    result[missing] = None
+    return result
+
+
+def _as_values(values):
+    """
+    Convert values to a float array, turning non-numeric entries into NaN.
+    """
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+
+
+def values_match(expected, actual, atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL):
+    """
+    Element-wise tolerance check between two value arrays.
+
+    Args:
+        expected (array-like): Values computed locally
+        actual (array-like): Values returned by the API
+        atol (float): Absolute tolerance
+        rtol (float): Relative tolerance, applied to the magnitude of the API value
+
+    Returns:
+        np.ndarray: Boolean array, False wherever either side is missing
+    """
+    expected = _as_values(expected)
+    actual = _as_values(actual)
+    with np.errstate(invalid="ignore"):
+        return np.abs(expected - actual) <= atol + rtol * np.abs(actual)
+
+
+def compare_results(
+    processed_labels,
+    processed_values,
+    api_labels,
+    api_values,
+    atol=DEFAULT_ATOL,
+    rtol=DEFAULT_RTOL,
+):
+    """
+    Compare processed results with API results row by row using whole-column operations.
+
+    Args:
+        processed_labels (array-like): Group labels computed locally
+        processed_values (array-like): Aggregated values computed locally
+        api_labels (array-like): Labels returned by the API
+        api_values (array-like): Values returned by the API
+        atol (float): Absolute tolerance for value matching
+        rtol (float): Relative tolerance for value matching
+
+    Returns:
+        pd.DataFrame: One row per compared position with the columns
+            processed_label, processed_value, api_label, api_value,
+            label_match and value_match
+    """
+    processed_labels = _as_labels(processed_labels)
+    api_labels = _as_labels(api_labels)
+    processed_values = _as_values(processed_values)
+    api_values = _as_values(api_values)
+
+    # Pad the shorter side so that unmatched rows show up as mismatches
+    length = max(len(processed_labels), len(processed_values), len(api_labels), len(api_values))
+    processed_labels = _pad(processed_labels, length, None)
+    api_labels = _pad(api_labels, length, None)
+    processed_values = _pad(processed_values, length, np.nan)
+    api_values = _pad(api_values, length, np.nan)
+
+    processed_missing = pd.isna(processed_labels)
+    api_missing = pd.isna(api_labels)
+    label_match = (processed_labels == api_labels) & ~processed_missing & ~api_missing
+
+    value_match = values_match(processed_values, api_values, atol=atol, rtol=rtol)
+
+    return pd.DataFrame({
+        "processed_label": np.where(processed_missing, "N/A", processed_labels),
+        "processed_value": np.nan_to_num(processed_values, nan=0.0),
+        "api_label": np.where(api_missing, "N/A", api_labels),
+        "api_value": np.nan_to_num(api_values, nan=0.0),
+        "label_match": label_match.astype(bool),
+        "value_match": value_match,
+    })
+
+
+def summarize_comparison(comparison):
+    """
+    Summarize a comparison result.
+
+    Args:
+        comparison (pd.DataFrame): Result of compare_results
+
+    Returns:
+        dict: Row count, number of label and value mismatches and overall status,
+            plus matched/missing/extra label counts for joined comparisons
+    """
+    value_mismatches = int((~comparison["value_match"]).sum())
+    summary = {
+        "rows": len(comparison),
+        "label_mismatches": int((~comparison["label_match"]).sum()),
+        "value_mismatches": value_mismatches,
+        "status": "Passed" if value_mismatches == 0 else "Failed",
+    }
+    if "join_status" in comparison:
+        counts = comparison["join_status"].value_counts()
+        for join_status in ("matched", "missing_in_api", "extra_in_api"):
+            summary[join_status] = int(counts.get(join_status, 0))
+    return summary
+
+
+def join_results(
+    processed_labels,
+    processed_values,
+    api_labels,
+    api_values,
+    atol=DEFAULT_ATOL,
+    rtol=DEFAULT_RTOL,
+):
+    """
+    Join processed results with API results on the group label and compare them.
+
+    Labels are matched through a hash index in a single pass, so ordering
+    differences between both sides do not cause mismatches. Processed rows
+    keep their order; API labels without a processed counterpart are appended.
+
+    Args:
+        processed_labels (array-like): Group labels computed locally
+        processed_values (array-like): Aggregated values computed locally
+        api_labels (array-like): Labels returned by the API
+        api_values (array-like): Values returned by the API
+        atol (float): Absolute tolerance for value matching
+        rtol (float): Relative tolerance for value matching
+
+    Returns:
+        pd.DataFrame: The columns of compare_results plus a join_status column
+            holding "matched", "missing_in_api" or "extra_in_api"
+    """
+    processed_labels = _as_labels(processed_labels)
+    processed_values = _as_values(processed_values)
+    api_labels = _as_labels(api_labels)
+    api_values = _as_values(api_values)
+
+    # Index the first occurrence of every API label; repeated labels are reported as extras
+    api_index = pd.Index(api_labels)
+    first_positions = np.flatnonzero(~api_index.duplicated(keep="first"))
+    lookup = api_index[first_positions]
+
+    found = lookup.get_indexer(processed_labels)
+    matched = found >= 0
+    api_positions = _take(first_positions, found, -1)
+
+    used = np.zeros(len(api_labels), dtype=bool)
+    used[api_positions[matched]] = True
+    extra_positions = np.flatnonzero(~used)
+
+    # Align both sides: processed rows first, then API-only rows
+    aligned_api_positions = np.concatenate([api_positions, extra_positions])
+    aligned_api_labels = _take(api_labels, aligned_api_positions, None)
+    aligned_api_values = _take(api_values, aligned_api_positions, np.nan)
+    aligned_processed_labels = _pad(processed_labels, len(aligned_api_positions), None)
+    aligned_processed_values = _pad(processed_values, len(aligned_api_positions), np.nan)
+
+    comparison = compare_results(
+        aligned_processed_labels,
+        aligned_processed_values,
+        aligned_api_labels,
+        aligned_api_values,
+        atol=atol,
+        rtol=rtol,
+    )
+    comparison["join_status"] = np.concatenate([
+        np.where(matched, "matched", "missing_in_api"),
+        np.full(len(extra_positions), "extra_in_api"),
+    ]).astype(object)
+    return comparison
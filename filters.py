@@ -0,0 +1,116 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+FILTER_BACKENDS = ["numpy", "query"]
+
+
+def _date_bounds(column, start, end):
+    """
+    Convert an inclusive date range into datetime64 bounds [start, end + 1 day).
+    """
+    lower = pd.Timestamp(start)
+    upper = pd.Timestamp(end) + datetime.timedelta(days=1)
+    tz = getattr(column.dtype, "tz", None)
+    if tz is not None:
+        lower, upper = lower.tz_localize(tz), upper.tz_localize(tz)
+    return lower, upper
+
+
+def _values_mask(column, values):
+    # Categorical columns are matched on their integer codes
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        values = list(values)
+        codes = column.cat.categories.get_indexer(values)
+        selected = codes[codes >= 0]
+        # Missing values have code -1 and are never among the categories
+        if any(pd.isna(value) for value in values):
+            selected = np.append(selected, -1)
+        return np.isin(column.cat.codes.to_numpy(), selected)
+    return column.isin(values).to_numpy()
+
+
+def compile_filter_spec(filter_spec):
+    """
+    Compile a filter spec into a function that computes one combined boolean mask.
+
+    Args:
+        filter_spec (list of dict): Filters with a "column", a "kind" and either
+            "start"/"end" dates, "min"/"max" bounds or a "values" list
+
+    Returns:
+        callable: Takes a DataFrame and returns a NumPy boolean mask of its rows
+    """
+    filter_spec = list(filter_spec)
+
+    def build_mask(data):
+        mask = np.ones(len(data), dtype=bool)
+        for filter_condition in filter_spec:
+            column = data[filter_condition["column"]]
+            kind = filter_condition["kind"]
+            if kind == "date":
+                # Compare on datetime64 values instead of converting to date objects
+                lower, upper = _date_bounds(column, filter_condition["start"], filter_condition["end"])
+                mask &= (column >= lower).to_numpy() & (column < upper).to_numpy()
+            elif kind == "range":
+                mask &= (column >= filter_condition["min"]).to_numpy()
+                mask &= (column <= filter_condition["max"]).to_numpy()
+            else:
+                mask &= _values_mask(column, filter_condition["values"])
+        return mask
+
+    return build_mask
+
+
+def filter_expression(data, filter_spec):
+    """
+    Translate a filter spec into a DataFrame.eval expression and its local variables.
+
+    Returns:
+        tuple: (expression string, dict of local variables)
+    """
+    clauses = []
+    local_dict = {}
+    for i, filter_condition in enumerate(filter_spec):
+        column = f"`{filter_condition['column']}`"
+        kind = filter_condition["kind"]
+        if kind == "date":
+            lower, upper = _date_bounds(
+                data[filter_condition["column"]], filter_condition["start"], filter_condition["end"]
+            )
+            local_dict[f"lower_{i}"], local_dict[f"upper_{i}"] = lower, upper
+            clauses.append(f"({column} >= @lower_{i}) & ({column} < @upper_{i})")
+        elif kind == "range":
+            local_dict[f"lower_{i}"] = filter_condition["min"]
+            local_dict[f"upper_{i}"] = filter_condition["max"]
+            clauses.append(f"({column} >= @lower_{i}) & ({column} <= @upper_{i})")
+        else:
+            local_dict[f"values_{i}"] = list(filter_condition["values"])
+            clauses.append(f"({column} in @values_{i})")
+    return " & ".join(clauses), local_dict
+
+
+def apply_filter_spec(data, filter_spec, backend="numpy"):
+    """
+    Apply a list of filters to a DataFrame, materializing the result once.
+
+    Args:
+        data (pd.DataFrame): Data to filter
+        filter_spec (list of dict): Filters as accepted by compile_filter_spec
+        backend (str): "numpy" to combine per-column masks, or "query" to
+            evaluate one expression with DataFrame.eval (numexpr if installed)
+
+    Returns:
+        pd.DataFrame: Rows matching every filter; data itself if there are no filters
+    """
+    if not filter_spec:
+        return data
+    if backend == "query":
+        expression, local_dict = filter_expression(data, filter_spec)
+        mask = data.eval(expression, local_dict=local_dict).to_numpy(dtype=bool)
+    else:
+        mask = compile_filter_spec(filter_spec)(data)
+    if mask.all():
+        return data
+    return data[mask]
@@ -0,0 +1,100 @@
+import datetime
+import time
+
+import pandas as pd
+import streamlit as st
+
+from log_store import NAME_FIELDS, TREND_PERIODS
+from rendering import DEFAULT_PAGE_SIZE, render_table
+
+# Newest test cases and regressions listed; counts and rates cover all matches
+HISTORY_TABLE_LIMIT = 5000
+
+# Sidebar labels of the test case name fields
+NAME_FIELD_LABELS = {
+    "aggregation": "Aggregation",
+    "group_by": "Grouped By",
+    "value_field": "Value Field",
+}
+
+
+def _date_range(options):
+    # Default to the whole logged period
+    if options["first_logged"] is None:
+        today = datetime.date.today()
+        return today, today
+    return (
+        pd.Timestamp(options["first_logged"]).date(),
+        pd.Timestamp(options["last_logged"]).date(),
+    )
+
+
+def render_history(store, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Show logged test cases with filters, pass rate trends and regressions.
+
+    Every figure is computed by an indexed SQLite query, so the page stays
+    fast as the log grows instead of parsing the whole log.
+
+    Args:
+        store (LogStore): Test log to query
+        page_size (int): Rows per page of the history table
+    """
+    st.subheader("📚 Test History")
+    start = time.perf_counter()
+    options = store.history_options()
+
+    st.sidebar.subheader("📚 History Filters")
+    criteria = {
+        "statuses": st.sidebar.multiselect("Status", options=options["status"]),
+    }
+    for field in NAME_FIELDS:
+        criteria[f"{field}s"] = st.sidebar.multiselect(
+            NAME_FIELD_LABELS[field], options=options[field], key=f"history_{field}"
+        )
+    first_date, last_date = _date_range(options)
+    date_range = st.sidebar.date_input(
+        "Logged Between", value=(first_date, last_date), key="history_dates"
+    )
+    # The date input returns a single date while a range is being picked; the
+    # whole logged period needs no date condition, which keeps queries on the narrower indexes
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        if tuple(date_range) != (first_date, last_date):
+            criteria["start"], criteria["end"] = date_range
+    criteria["search"] = st.sidebar.text_input("Description or Name Contains", key="history_search")
+    period = st.sidebar.selectbox("Trend Period", options=list(TREND_PERIODS), key="history_period")
+
+    history = store.query_history(limit=HISTORY_TABLE_LIMIT, **criteria)
+    trend = store.pass_rate_trend(period, **criteria)
+    by_aggregation = store.pass_rate_by("aggregation", **criteria)
+    regressions = store.regressions(limit=HISTORY_TABLE_LIMIT, **criteria)
+    query_seconds = time.perf_counter() - start
+
+    total = int(trend["total"].sum())
+    passed = int(trend["passed"].sum())
+    st.write(
+        f"Test Cases: {total} | Passed: {passed} | Pass Rate: {passed / total:.1%}"
+        if total else "No logged test cases match the filters."
+    )
+    st.caption(f"Queried in {query_seconds * 1000:.0f} ms")
+    if not total:
+        return
+
+    st.subheader("📈 Pass Rate Trend")
+    st.line_chart(trend.set_index("period")["pass_rate"])
+
+    st.subheader("🧮 Pass Rate per Aggregation")
+    by_aggregation["aggregation"] = by_aggregation["aggregation"].fillna("(none)")
+    st.bar_chart(by_aggregation.set_index("aggregation")["pass_rate"])
+    render_table(by_aggregation, key="history_aggregation", page_size=page_size)
+
+    st.subheader("⚠️ Regressions")
+    if regressions.empty:
+        st.write("No test case failed after its previous run passed.")
+    else:
+        render_table(regressions, key="history_regressions", page_size=page_size)
+
+    st.subheader("🗂️ Logged Test Cases")
+    if total > len(history):
+        st.caption(f"Showing the newest {len(history)} of {total} test cases")
+    render_table(history, key="history", page_size=page_size)
@@ -0,0 +1,297 @@
+import numpy as np
+import pandas as pd
+
+from filters import compile_filter_spec
+from parallel import parallel_group_sum, use_parallel
+
+# Default memory budget for streaming ingestion, in megabytes
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+# Rows sampled from the upload to estimate the in-memory size of a row
+SAMPLE_ROWS = 1000
+
+# Working copies made per chunk (filter masks, filtered slice, partial aggregates)
+CHUNK_OVERHEAD_FACTOR = 3
+
+# Maximum number of distinct values collected per text column while streaming
+MAX_UNIQUE_VALUES = 1000
+
+STREAMING_ENGINES = ["pandas", "pyarrow"]
+
+# Text columns with at most this share of distinct values are stored as category
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def _is_csv(uploaded_file):
+    return uploaded_file.name.endswith(".csv")
+
+
+def _rewind(uploaded_file):
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+
+
+def read_upload(uploaded_file):
+    """
+    Load the whole uploaded file into a DataFrame.
+    """
+    _rewind(uploaded_file)
+    if _is_csv(uploaded_file):
+        data = pd.read_csv(uploaded_file)
+    else:
+        data = pd.read_excel(uploaded_file)
+
+    # Ensure datetime columns are properly converted
+    for col in data.columns:
+        if pd.api.types.is_datetime64_any_dtype(data[col]):
+            data[col] = pd.to_datetime(data[col])
+
+    return data
+
+
+def optimize_dtypes(data, category_max_unique_ratio=CATEGORY_MAX_UNIQUE_RATIO, use_arrow=False):
+    """
+    Shrink a DataFrame's memory footprint without changing its values.
+
+    Integers are downcast to the smallest type that holds them (sums are
+    still accumulated as int64), low-cardinality text columns become
+    category, and with use_arrow the remaining text columns become
+    Arrow-backed strings. Floats are left as float64 so that grouped sums
+    stay bit-identical.
+
+    Args:
+        data (pd.DataFrame): Loaded data
+        category_max_unique_ratio (float): Highest distinct/total ratio converted to category
+        use_arrow (bool): Store other text columns as "string[pyarrow]"
+
+    Returns:
+        tuple: (optimized DataFrame, report dict with memory before and after in
+            bytes and the new dtype of every converted column)
+    """
+    before_bytes = int(data.memory_usage(deep=True).sum())
+    converted = {}
+    columns = {}
+    for col in data.columns:
+        series = data[col]
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            optimized = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if len(series) and series.nunique(dropna=True) <= category_max_unique_ratio * len(series):
+                optimized = series.astype("category")
+            elif use_arrow:
+                optimized = series.astype("string[pyarrow]")
+            else:
+                optimized = series
+        else:
+            optimized = series
+
+        if optimized.dtype != series.dtype:
+            columns[col] = optimized
+            converted[col] = str(optimized.dtype)
+
+    if columns:
+        data = data.assign(**columns)
+    report = {
+        "before_bytes": before_bytes,
+        "after_bytes": int(data.memory_usage(deep=True).sum()),
+        "converted": converted,
+    }
+    return data, report
+
+
+def _iter_csv_chunks(uploaded_file, chunk_rows, engine):
+    if engine == "pyarrow":
+        try:
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            raise ImportError("The pyarrow streaming engine requires the 'pyarrow' package")
+
+        # pyarrow reads in byte-sized blocks; size them to roughly chunk_rows rows
+        sample = pd.read_csv(uploaded_file, nrows=SAMPLE_ROWS)
+        _rewind(uploaded_file)
+        bytes_per_row = max(1, len(sample.to_csv(index=False).encode()) // max(1, len(sample)))
+        read_options = pa_csv.ReadOptions(block_size=max(1 << 16, chunk_rows * bytes_per_row))
+        reader = pa_csv.open_csv(uploaded_file, read_options=read_options)
+        rows_read = 0
+        try:
+            for batch in reader:
+                rows_read += batch.num_rows
+                yield batch.to_pandas()
+            return
+        except pa.ArrowInvalid:
+            # Column types are inferred from the first block only, so a later
+            # block of another type (e.g. a float in an int column) aborts the
+            # read; the pandas engine, which infers per chunk, reads the rest
+            pass
+        _rewind(uploaded_file)
+        yield from pd.read_csv(uploaded_file, chunksize=chunk_rows, skiprows=range(1, rows_read + 1))
+    else:
+        yield from pd.read_csv(uploaded_file, chunksize=chunk_rows)
+
+
+def _iter_excel_chunks(uploaded_file, chunk_rows):
+    from openpyxl import load_workbook
+
+    # Read-only mode streams rows instead of loading the whole workbook
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(col) if col is not None else f"Unnamed: {i}" for i, col in enumerate(header)]
+
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_upload_chunks(uploaded_file, chunk_rows, engine="pandas"):
+    """
+    Stream the uploaded file as DataFrame chunks.
+
+    Args:
+        uploaded_file: File-like object with a ``name`` attribute
+        chunk_rows (int): Approximate number of rows per chunk
+        engine (str): "pandas" or "pyarrow" for CSV files; Excel files always
+            use openpyxl in read-only mode
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the upload
+    """
+    _rewind(uploaded_file)
+    if _is_csv(uploaded_file):
+        yield from _iter_csv_chunks(uploaded_file, chunk_rows, engine)
+    else:
+        yield from _iter_excel_chunks(uploaded_file, chunk_rows)
+
+
+def chunk_rows_for_budget(uploaded_file, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """
+    Estimate how many rows fit in one chunk for the given memory budget.
+
+    Args:
+        uploaded_file: File-like object with a ``name`` attribute
+        memory_budget_mb (float): Peak memory allowed for a chunk and its working copies
+
+    Returns:
+        int: Number of rows per chunk
+    """
+    sample = next(iter_upload_chunks(uploaded_file, SAMPLE_ROWS), None)
+    _rewind(uploaded_file)
+    if sample is None or sample.empty:
+        return SAMPLE_ROWS
+
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    budget_bytes = memory_budget_mb * 1024 * 1024
+    return max(SAMPLE_ROWS, int(budget_bytes / (bytes_per_row * CHUNK_OVERHEAD_FACTOR)))
+
+
+def _column_kind(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "date"
+    if pd.api.types.is_numeric_dtype(series):
+        return "range"
+    return "values"
+
+
+def column_stats(chunks, columns=None, max_unique_values=MAX_UNIQUE_VALUES):
+    """
+    Collect the statistics needed to render filter widgets in one pass over the chunks.
+
+    Args:
+        chunks (iterable of pd.DataFrame): Data chunks, or a single-item list for a loaded frame
+        columns (list, optional): Only collect these columns; by default all of them
+        max_unique_values (int, optional): Cap on the distinct values kept per
+            column; None keeps all of them
+
+    Returns:
+        dict: Per column, its filter kind ("date", "range" or "values") with
+            either min/max or the distinct values seen, and whether that list
+            was truncated
+    """
+    stats = {}
+    for chunk in chunks:
+        for col in columns if columns is not None else chunk.columns:
+            series = chunk[col]
+            kind = _column_kind(series)
+            entry = stats.setdefault(
+                col, {"kind": kind, "min": None, "max": None, "values": None, "truncated": False}
+            )
+            if entry["kind"] != kind:
+                # Types disagree between chunks; fall back to a value list
+                entry["kind"] = "values"
+
+            if kind in ("date", "range") and series.notna().any():
+                chunk_min, chunk_max = series.min(), series.max()
+                entry["min"] = chunk_min if entry["min"] is None else min(entry["min"], chunk_min)
+                entry["max"] = chunk_max if entry["max"] is None else max(entry["max"], chunk_max)
+            if entry["kind"] == "values" and not entry["truncated"]:
+                # Distinct values in order of first appearance, merged chunk by chunk
+                values = pd.Series(series.unique(), dtype=object)
+                if entry["values"] is not None:
+                    values = pd.concat([entry["values"], values], ignore_index=True).drop_duplicates()
+                if max_unique_values is not None and len(values) > max_unique_values:
+                    values = values.iloc[:max_unique_values]
+                    entry["truncated"] = True
+                entry["values"] = values
+
+    for entry in stats.values():
+        entry["values"] = entry["values"].tolist() if entry["values"] is not None else []
+    return stats
+
+
+def group_sum(data, group_column, agg_column, workers=1):
+    """
+    Sum agg_column per group_column, with the group labels converted to strings.
+
+    With workers > 1, large frames are summed in a process pool by
+    parallel.parallel_group_sum, which gives the same result.
+    """
+    if use_parallel(data, agg_column, workers):
+        return parallel_group_sum(data, group_column, agg_column, workers)
+    grouped = data.groupby(group_column, observed=True)[agg_column].sum().reset_index()
+    grouped[group_column] = grouped[group_column].astype(str)
+    return grouped
+
+
+def chunked_group_sum(chunks, group_column, agg_column, filter_spec=()):
+    """
+    Compute the filtered group-by sum incrementally over chunks.
+
+    Only the running per-group totals are kept between chunks, so memory is
+    bounded by the chunk size plus the number of groups.
+
+    Args:
+        chunks (iterable of pd.DataFrame): Data chunks
+        group_column (str): Column to group by
+        agg_column (str): Numeric column to sum
+        filter_spec (list of dict): Filters as accepted by filters.compile_filter_spec
+
+    Returns:
+        tuple: (grouped DataFrame with group_column and agg_column, number of filtered rows)
+    """
+    build_mask = compile_filter_spec(filter_spec)
+    totals = None
+    filtered_rows = 0
+    for chunk in chunks:
+        if filter_spec:
+            chunk = chunk[build_mask(chunk)]
+        filtered_rows += len(chunk)
+        partial = chunk.groupby(group_column, observed=True)[agg_column].sum()
+        totals = partial if totals is None else pd.concat([totals, partial]).groupby(level=0).sum()
+
+    if totals is None:
+        totals = pd.Series([], name=agg_column, dtype=np.float64)
+        totals.index.name = group_column
+    return totals.reset_index(), filtered_rows
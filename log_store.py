@@ -0,0 +1,555 @@
+import ast
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Default location of the test log database
+DEFAULT_LOG_PATH = "VisualizerTests.db"
+
+# Seconds a writer waits for another process holding the database lock
+BUSY_TIMEOUT_SECONDS = 30
+
+# Columns of the test log, in the order of the legacy CSV file
+LOG_COLUMNS = [
+    "Test Case ID",
+    "Test Case Description",
+    "Filters",
+    "Expected Result",
+    "Actual Result",
+    "Status",
+    "Remarks",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS test_cases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    description TEXT,
+    filters TEXT,
+    expected_result TEXT,
+    actual_result TEXT,
+    status TEXT,
+    remarks TEXT,
+    logged_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    expected_digest TEXT,
+    actual_digest TEXT,
+    profile TEXT
+);
+CREATE TABLE IF NOT EXISTS result_blobs (
+    digest TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+# Columns added after the first release of the schema, with their types
+_ADDED_COLUMNS = {
+    "expected_digest": "TEXT",
+    "actual_digest": "TEXT",
+    "profile": "TEXT",
+    "aggregation": "TEXT",
+    "group_by": "TEXT",
+    "value_field": "TEXT",
+}
+
+# Indexes behind the test history filters and trends; each one also holds the
+# status, so pass rates are counted from the index without reading the rows
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS test_cases_logged_at ON test_cases (logged_at, status);
+CREATE INDEX IF NOT EXISTS test_cases_status ON test_cases (status, logged_at);
+CREATE INDEX IF NOT EXISTS test_cases_aggregation ON test_cases (aggregation, logged_at, status);
+CREATE INDEX IF NOT EXISTS test_cases_group_by ON test_cases (group_by, logged_at, status);
+CREATE INDEX IF NOT EXISTS test_cases_value_field ON test_cases (value_field, logged_at, status);
+CREATE INDEX IF NOT EXISTS test_cases_description ON test_cases (description, id, status, logged_at);
+"""
+
+# Fields of the test case name written by utils.generate_test_case_name
+NAME_FIELDS = ["aggregation", "group_by", "value_field"]
+
+# Only parses names logged before the fields were stored; each part after the
+# first must follow whitespace, so "region" in "grouped by region" is not split at "on"
+_NAME_PATTERN = re.compile(
+    r"^(?:aggregating by (?P<aggregation>.+?))?"
+    r"(?:(?:^|\s+)grouped by (?P<group_by>.+?))?"
+    r"(?:(?:^|\s+)on (?P<value_field>.+?))?"
+    r"(?:(?:^|\s+)with filters: .*)?$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+_FIELDS = ["id", "description", "filters", "expected_result", "actual_result", "status", "remarks"]
+
+
+def encode_result(result):
+    """
+    Encode an expected or actual result as compressed canonical JSON.
+
+    DataFrames are stored column-wise so their column names appear once.
+
+    Returns:
+        tuple: (content digest, compressed bytes)
+    """
+    if isinstance(result, pd.DataFrame):
+        document = {
+            "type": "frame",
+            "columns": [str(col) for col in result.columns],
+            "values": [result[col].tolist() for col in result.columns],
+        }
+    else:
+        document = {"type": "json", "value": result}
+    encoded = json.dumps(document, separators=(",", ":"), sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest(), zlib.compress(encoded, 9)
+
+
+def decode_result(data):
+    """
+    Decode a result stored by encode_result back to a DataFrame or a JSON value.
+    """
+    document = json.loads(zlib.decompress(data))
+    if document["type"] == "frame":
+        return pd.DataFrame(dict(zip(document["columns"], document["values"])), columns=document["columns"])
+    return document["value"]
+
+
+_INSERT_BLOB = "INSERT OR IGNORE INTO result_blobs (digest, data) VALUES (?, ?)"
+
+_INSERT_TEST_CASE = (
+    "INSERT INTO test_cases (id, description, filters, expected_result, actual_result, "
+    "status, remarks, expected_digest, actual_digest, aggregation, group_by, value_field) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def name_fields_from_plan(data_processing):
+    """
+    Take the aggregation, group-by and value field of a test case from the
+    dataProcessing section of the API response, lowercased.
+
+    Lists are joined with ", " as in utils.generate_test_case_name.
+
+    Returns:
+        dict: One entry per NAME_FIELDS item; None where the plan has no such part
+    """
+    data_processing = data_processing if isinstance(data_processing, dict) else {}
+    fields = {}
+    for field, key in zip(NAME_FIELDS, ("aggregation", "groupBy", "valueField")):
+        value = data_processing.get(key)
+        if isinstance(value, (list, tuple)):
+            value = ", ".join(str(item) for item in value)
+        fields[field] = str(value).lower() if value not in (None, "") else None
+    return fields
+
+
+def parse_test_case_name(name):
+    """
+    Split a legacy test case name like "Aggregating by sum grouped by task on days"
+    into its aggregation, group-by and value field, lowercased.
+
+    Returns:
+        dict: One entry per NAME_FIELDS item; None where the name has no such part
+    """
+    match = _NAME_PATTERN.match(name.strip()) if isinstance(name, str) else None
+    if match is None:
+        return dict.fromkeys(NAME_FIELDS)
+    return {field: match.group(field).lower() if match.group(field) else None for field in NAME_FIELDS}
+
+
+def _result_row(row, blobs, name_fields):
+    """
+    Turn (id, description, filters, expected, actual, status, remarks) and the
+    test case name fields into an insert row, moving structured results to blobs.
+    """
+    test_case_id, description, filters, expected, actual, status, remarks = row
+    columns = {}
+    for name, result in (("expected", expected), ("actual", actual)):
+        if result is None or isinstance(result, str):
+            columns[name] = (result, None)
+        else:
+            digest, data = encode_result(result)
+            columns[name] = (None, digest)
+            blobs.append((digest, data))
+    return (
+        test_case_id, description, filters, columns["expected"][0], columns["actual"][0],
+        status, remarks, columns["expected"][1], columns["actual"][1],
+        *(name_fields[field] for field in NAME_FIELDS),
+    )
+
+
+# Buckets of the pass rate trend, as SQLite strftime formats of logged_at
+TREND_PERIODS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+
+def _history_where(statuses=None, aggregations=None, group_bys=None, value_fields=None,
+                   start=None, end=None, search=None, table=None):
+    """
+    Build the WHERE clause shared by the history queries.
+
+    List criteria match any of their values; start and end are inclusive
+    dates compared against logged_at so the indexes can be used.
+
+    Args:
+        table (str, optional): Alias to qualify the test_cases columns with
+
+    Returns:
+        tuple: (SQL clause, possibly empty, and its parameters)
+    """
+    prefix = f"{table}." if table else ""
+    clauses = []
+    params = []
+    for column, values in (
+        ("status", statuses),
+        ("aggregation", aggregations),
+        ("group_by", group_bys),
+        ("value_field", value_fields),
+    ):
+        if values:
+            clauses.append(f"{prefix}{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if start is not None:
+        clauses.append(f"{prefix}logged_at >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append(f"{prefix}logged_at < date(?, '+1 day')")
+        params.append(str(end))
+    if search:
+        clauses.append(f"({prefix}description LIKE ? OR {prefix}filters LIKE ?)")
+        params.extend([f"%{search}%"] * 2)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _parse_legacy_result(text):
+    # Legacy logs stored results with str(); literal_eval runs once, during import
+    if text is None:
+        return None
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return text
+
+
+class LogStore:
+    """
+    SQLite-backed test log with O(1) appends and atomic test case ID allocation.
+
+    The database runs in WAL mode, so readers never block the single writer
+    and concurrent writers from other sessions or processes wait on the
+    SQLite lock instead of overwriting each other.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(test_cases)")}
+            for column, column_type in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE test_cases ADD COLUMN {column} {column_type}")
+            if not set(NAME_FIELDS) <= existing:
+                # Logs written before the name fields existed are parsed once
+                rows = connection.execute("SELECT id, filters FROM test_cases").fetchall()
+                connection.executemany(
+                    "UPDATE test_cases SET aggregation = ?, group_by = ?, value_field = ? WHERE id = ?",
+                    [
+                        (*parse_test_case_name(filters).values(), test_case_id)
+                        for test_case_id, filters in rows
+                    ],
+                )
+            connection.executescript(_INDEXES)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation; committed on success, always closed
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS)
+        try:
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def append(self, description, filters, expected_result, actual_result, status, remarks,
+               test_case_id=None, profile=None, name_fields=None):
+        """
+        Append one test case and return its ID.
+
+        Expected and actual results given as strings are stored as-is; any
+        other value (a DataFrame or JSON data) goes to a content-addressed
+        side table, so identical results are stored only once.
+
+        Args:
+            test_case_id (int, optional): Explicit ID; by default the next free ID is allocated
+            profile (str, optional): JSON run profile stored with the test case
+            name_fields (dict, optional): Aggregation, group-by and value field
+                filtered on in the history, e.g. from name_fields_from_plan
+
+        Returns:
+            int: ID of the logged test case
+        """
+        blobs = []
+        row = _result_row(
+            (test_case_id, description, filters, expected_result, actual_result, status, remarks),
+            blobs,
+            name_fields or dict.fromkeys(NAME_FIELDS),
+        )
+        with self._connect() as connection:
+            connection.executemany(_INSERT_BLOB, blobs)
+            logged_id = connection.execute(_INSERT_TEST_CASE, row).lastrowid
+            if profile is not None:
+                connection.execute("UPDATE test_cases SET profile = ? WHERE id = ?", (profile, logged_id))
+            return logged_id
+
+    def load_results(self, test_case_id):
+        """
+        Load the expected and actual results of one test case.
+
+        Returns:
+            tuple: (expected, actual); structured results are decoded, legacy
+                results are returned as the stored strings
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT t.expected_result, t.actual_result, e.data, a.data FROM test_cases t "
+                "LEFT JOIN result_blobs e ON e.digest = t.expected_digest "
+                "LEFT JOIN result_blobs a ON a.digest = t.actual_digest WHERE t.id = ?",
+                (test_case_id,),
+            ).fetchone()
+        if row is None:
+            raise KeyError(test_case_id)
+        expected_text, actual_text, expected_data, actual_data = row
+        expected = decode_result(expected_data) if expected_data is not None else expected_text
+        actual = decode_result(actual_data) if actual_data is not None else actual_text
+        return expected, actual
+
+    def load_profile(self, test_case_id):
+        """
+        Load the run profile stored with a test case, or None if it has none.
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT profile FROM test_cases WHERE id = ?", (test_case_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(test_case_id)
+        return json.loads(row[0]) if row[0] is not None else None
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM test_cases").fetchone()[0]
+
+    def to_dataframe(self, include_results=True):
+        """
+        Load the whole log with the column names of the legacy CSV file.
+
+        Args:
+            include_results (bool): Fill the result columns with JSON text for
+                structured results; when False they hold only legacy strings
+        """
+        with self._connect() as connection:
+            if include_results:
+                data = pd.read_sql_query(
+                    "SELECT t.id, t.description, t.filters, t.expected_result, t.actual_result, "
+                    "t.status, t.remarks, e.data AS expected_data, a.data AS actual_data "
+                    "FROM test_cases t "
+                    "LEFT JOIN result_blobs e ON e.digest = t.expected_digest "
+                    "LEFT JOIN result_blobs a ON a.digest = t.actual_digest ORDER BY t.id",
+                    connection,
+                )
+            else:
+                data = pd.read_sql_query(
+                    f"SELECT {', '.join(_FIELDS)} FROM test_cases ORDER BY id", connection
+                )
+
+        if include_results:
+            # Identical results share a blob, so each one is decompressed once
+            decoded = {}
+            for text_column, data_column in (("expected_result", "expected_data"), ("actual_result", "actual_data")):
+                blobs = data.pop(data_column)
+                has_blob = blobs.notna()
+                texts = []
+                for blob in blobs[has_blob]:
+                    if blob not in decoded:
+                        decoded[blob] = zlib.decompress(blob).decode("utf-8")
+                    texts.append(decoded[blob])
+                data.loc[has_blob, text_column] = texts
+        data.columns = LOG_COLUMNS
+        return data
+
+    def import_csv(self, csv_path):
+        """
+        Import a legacy CSV test log, keeping its test case IDs.
+
+        Results stored as Python-repr strings are parsed once here and
+        stored in structured form; unparseable results are kept as text.
+
+        Returns:
+            int: Number of imported test cases
+        """
+        legacy = pd.read_csv(csv_path)
+        legacy = legacy.reindex(columns=LOG_COLUMNS)
+        legacy = legacy.astype(object).where(legacy.notna(), None)
+
+        blobs = []
+        rows = []
+        for test_case_id, description, filters, expected, actual, status, remarks in legacy.itertuples(
+            index=False, name=None
+        ):
+            expected = _parse_legacy_result(expected)
+            if isinstance(expected, list):
+                expected = pd.DataFrame.from_records(expected)
+            rows.append(_result_row(
+                (
+                    int(test_case_id) if test_case_id is not None else None,
+                    description, filters, expected, _parse_legacy_result(actual), status, remarks,
+                ),
+                blobs,
+                parse_test_case_name(filters),
+            ))
+
+        with self._connect() as connection:
+            connection.executemany(_INSERT_BLOB, blobs)
+            connection.executemany(_INSERT_TEST_CASE.replace("INSERT", "INSERT OR IGNORE", 1), rows)
+        return len(rows)
+
+    def export_csv(self, csv_path):
+        """
+        Write the log to a CSV file in the legacy layout, e.g. for Excel.
+        """
+        self.to_dataframe().to_csv(csv_path, index=False)
+
+    def history_options(self):
+        """
+        Return the distinct values of the history filters and the logged date range.
+
+        Returns:
+            dict: Sorted value lists for "status" and each NAME_FIELDS column, plus
+                "first_logged" and "last_logged" timestamps (None for an empty log)
+        """
+        options = {}
+        with self._connect() as connection:
+            for column in ["status"] + NAME_FIELDS:
+                # Each column has an index, so this reads the index rather than the table
+                options[column] = [
+                    row[0] for row in connection.execute(
+                        f"SELECT DISTINCT {column} FROM test_cases WHERE {column} IS NOT NULL ORDER BY {column}"
+                    )
+                ]
+            options["first_logged"], options["last_logged"] = connection.execute(
+                "SELECT MIN(logged_at), MAX(logged_at) FROM test_cases"
+            ).fetchone()
+        return options
+
+    def query_history(self, limit=None, **criteria):
+        """
+        Load logged test cases matching the history filters, newest first.
+
+        Only the summary columns are read; results stay in the database.
+
+        Args:
+            limit (int, optional): Return at most this many test cases
+            **criteria: Filters accepted by _history_where (statuses,
+                aggregations, group_bys, value_fields, start, end, search)
+
+        Returns:
+            pd.DataFrame: id, logged_at, description, name, status, the name fields and remarks
+        """
+        where, params = _history_where(**criteria)
+        query = (
+            "SELECT id, logged_at, description, filters AS name, status, aggregation, group_by, "
+            f"value_field, remarks FROM test_cases{where} ORDER BY id DESC"
+        )
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._connect() as connection:
+            return pd.read_sql_query(query, connection, params=params)
+
+    def pass_rate_trend(self, period="day", **criteria):
+        """
+        Count passed and logged test cases per day, week or month.
+
+        Returns:
+            pd.DataFrame: period, total, passed and pass_rate (0 to 1), oldest first
+        """
+        where, params = _history_where(**criteria)
+        query = (
+            "SELECT strftime(?, logged_at) AS period, COUNT(*) AS total, "
+            "SUM(status = 'Passed') AS passed, AVG(status = 'Passed') AS pass_rate "
+            f"FROM test_cases{where} GROUP BY period ORDER BY period"
+        )
+        with self._connect() as connection:
+            return pd.read_sql_query(query, connection, params=[TREND_PERIODS[period]] + params)
+
+    def pass_rate_by(self, column, **criteria):
+        """
+        Count passed and logged test cases per value of a name field, e.g. per aggregation.
+
+        Returns:
+            pd.DataFrame: the column, total, passed and pass_rate, most cases first
+        """
+        if column not in NAME_FIELDS:
+            raise ValueError(f"Unsupported history column: {column}")
+        where, params = _history_where(**criteria)
+        query = (
+            f"SELECT {column}, COUNT(*) AS total, SUM(status = 'Passed') AS passed, "
+            f"AVG(status = 'Passed') AS pass_rate FROM test_cases{where} "
+            f"GROUP BY {column} ORDER BY total DESC"
+        )
+        with self._connect() as connection:
+            return pd.read_sql_query(query, connection, params=params)
+
+    def regressions(self, limit=None, **criteria):
+        """
+        Find test cases that failed after the previous run of the same description passed.
+
+        Runs are matched on their description, so a prompt logged repeatedly
+        forms a history; the criteria select which failing runs are reported.
+
+        Args:
+            limit (int, optional): Return at most this many, newest first
+
+        Returns:
+            pd.DataFrame: id, logged_at, description, name, previous_id and previous_logged_at
+        """
+        where, params = _history_where(table="t", **criteria)
+        # Failed runs come from the status index; each previous run is one
+        # seek in the description index
+        query = (
+            "SELECT t.id, t.logged_at, t.description, t.filters AS name, p.id AS previous_id, "
+            "p.logged_at AS previous_logged_at FROM test_cases t "
+            "JOIN test_cases p ON p.id = (SELECT MAX(id) FROM test_cases "
+            "WHERE description = t.description AND id < t.id)"
+            + (where + " AND" if where else " WHERE")
+            + " t.status = 'Failed' AND p.status = 'Passed' ORDER BY t.id DESC"
+        )
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._connect() as connection:
+            return pd.read_sql_query(query, connection, params=params)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_log_store(path=DEFAULT_LOG_PATH):
+    """
+    Return the shared store for path, migrating the legacy CSV log next to it on first use.
+
+    A new database named ``VisualizerTests.db`` imports ``VisualizerTests.csv``
+    if that file exists.
+    """
+    with _stores_lock:
+        if path not in _stores:
+            is_new = not os.path.exists(path)
+            store = LogStore(path)
+            legacy_csv = os.path.splitext(path)[0] + ".csv"
+            if is_new and os.path.exists(legacy_csv):
+                store.import_csv(legacy_csv)
+            _stores[path] = store
+        return _stores[path]
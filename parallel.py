@@ -0,0 +1,162 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+# Below this many rows the process start-up costs more than the aggregation
+PARALLEL_MIN_ROWS = 1_000_000
+
+
+def default_workers():
+    """
+    Return the number of CPUs this process may use.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# One pool for the process, replaced when a run asks for a different size
+_executor_pool = None
+_executor_workers = None
+_executor_lock = threading.Lock()
+
+
+def _executor(workers):
+    """
+    Return the process pool, started once and reused across runs of the same size.
+
+    Workers are spawned rather than forked, which is safe from the threaded
+    Streamlit server; reusing them pays their start-up (importing pandas) once.
+    A different size replaces the pool, so idle pools never pile up.
+    """
+    global _executor_pool, _executor_workers
+    with _executor_lock:
+        if _executor_pool is None or _executor_workers != workers:
+            if _executor_pool is not None:
+                # Work already submitted by other runs still completes
+                _executor_pool.shutdown(wait=False)
+            _executor_pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            _executor_workers = workers
+        return _executor_pool
+
+
+@atexit.register
+def _shutdown_executor():
+    if _executor_pool is not None:
+        _executor_pool.shutdown(cancel_futures=True)
+
+
+def _group_codes(column):
+    """
+    Encode group keys as integer codes in sorted key order, -1 for missing keys.
+
+    Returns:
+        tuple: (codes array, function turning an array of codes back into a key Series)
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Categorical columns already hold codes in category order
+        return column.cat.codes.to_numpy(), lambda codes: pd.Series(
+            pd.Categorical.from_codes(codes, dtype=column.dtype)
+        )
+    codes, uniques = pd.factorize(column, sort=True)
+    return codes, lambda codes: pd.Series(uniques.take(codes))
+
+
+def _to_shared(array):
+    # Copy an array into a new shared memory block; workers map it without pickling
+    shared = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shared.buf)[:] = array
+    return shared, (shared.name, array.dtype.str, len(array))
+
+
+def _attach(spec):
+    name, dtype, length = spec
+    shared = SharedMemory(name=name)
+    return shared, np.ndarray((length,), dtype=np.dtype(dtype), buffer=shared.buf)
+
+
+def _partition_sum(codes_spec, values_spec, partition, partitions):
+    """
+    Sum the values of the groups whose code falls in one partition.
+
+    Every group is summed by exactly one worker over its rows in their
+    original order, so floating point sums match the serial group-by.
+    """
+    codes_memory, codes = _attach(codes_spec)
+    values_memory, values = _attach(values_spec)
+    try:
+        mask = (codes >= 0) & (codes % partitions == partition)
+        return pd.Series(values[mask]).groupby(codes[mask]).sum()
+    finally:
+        del codes, values
+        codes_memory.close()
+        values_memory.close()
+
+
+def use_parallel(data, agg_column, workers, min_rows=PARALLEL_MIN_ROWS):
+    """
+    Tell whether a group-by sum should run in a process pool.
+
+    Small frames and value columns that cannot be shared as plain NumPy
+    arrays (nullable, Arrow-backed or object dtypes) stay serial.
+    """
+    dtype = data[agg_column].dtype
+    return (
+        workers > 1
+        and len(data) >= min_rows
+        and isinstance(dtype, np.dtype)
+        and dtype.kind in "biuf"
+    )
+
+
+def parallel_group_sum(data, group_column, agg_column, workers=None):
+    """
+    Sum agg_column per group_column in a process pool.
+
+    Group keys are encoded once as integer codes; the codes and values are
+    placed in shared memory and each worker sums a disjoint set of groups,
+    so the result is identical to the serial ingestion.group_sum.
+
+    Args:
+        data (pd.DataFrame): Filtered data; agg_column must pass use_parallel
+        group_column (str): Column to group by
+        agg_column (str): Numeric column to sum
+        workers (int, optional): Worker processes; defaults to the available CPUs
+
+    Returns:
+        pd.DataFrame: group_column (as strings) and agg_column, sorted by group key
+    """
+    workers = workers or default_workers()
+    values = data[agg_column]
+    codes, keys_for = _group_codes(data[group_column])
+    shared_blocks = []
+    try:
+        codes_memory, codes_spec = _to_shared(codes)
+        shared_blocks.append(codes_memory)
+        values_memory, values_spec = _to_shared(values.to_numpy())
+        shared_blocks.append(values_memory)
+
+        partials = list(_executor(workers).map(
+            _partition_sum,
+            [codes_spec] * workers,
+            [values_spec] * workers,
+            range(workers),
+            [workers] * workers,
+        ))
+    finally:
+        for shared in shared_blocks:
+            shared.close()
+            shared.unlink()
+
+    # Partitions without groups are dropped so they cannot change the result dtype
+    totals = pd.concat([partial for partial in partials if len(partial)] or partials[:1]).sort_index()
+    return pd.DataFrame({
+        group_column: keys_for(totals.index.to_numpy()).astype(str),
+        agg_column: totals.to_numpy(),
+    })
@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import json
+import re
+import time
+
+import pandas as pd
+
+PAYLOAD_FORMATS = ["records", "columnar"]
+
+
+def _column_values(series):
+    """
+    Convert a column to a JSON-ready list without copying the whole frame.
+
+    Numeric NaN becomes None, missing text becomes an empty string and
+    timestamps are formatted as strings.
+    """
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.strftime("%Y-%m-%d %H:%M:%S").tolist()
+        fill = None
+    elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        values = series.tolist()
+        fill = None
+    else:
+        values = series.tolist()
+        fill = ""
+
+    for i in missing.nonzero()[0]:
+        values[i] = fill
+    return values
+
+
+def columns_in_prompt(data, user_prompt):
+    """
+    Find the columns whose name is mentioned in the prompt.
+
+    Args:
+        data (pd.DataFrame): Dataset sent to the API
+        user_prompt (str): Analysis prompt
+
+    Returns:
+        list: Mentioned columns in dataset order, or all columns if none is mentioned
+    """
+    prompt = re.sub(r"[\s_]+", " ", user_prompt.lower())
+    mentioned = [
+        col for col in data.columns
+        if re.search(r"\b" + re.escape(re.sub(r"[\s_]+", " ", str(col).lower())) + r"\b", prompt)
+    ]
+    return mentioned or list(data.columns)
+
+
+def _payload_data(data, payload_format, columns, sample_rows):
+    if columns is not None:
+        data = data[list(columns)]
+    if sample_rows and sample_rows < len(data):
+        data = data.sample(n=sample_rows, random_state=0).sort_index()
+
+    column_values = {col: _column_values(data[col]) for col in data.columns}
+
+    if payload_format == "columnar":
+        return {
+            "columns": [str(col) for col in column_values],
+            "values": list(column_values.values()),
+        }
+    keys = [str(col) for col in column_values]
+    return [dict(zip(keys, row)) for row in zip(*column_values.values())]
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def encode_payload_data(data, payload_format="records", columns=None, sample_rows=None):
+    """
+    Serialize only the dataset part of a payload to JSON.
+
+    The result depends on the data and payload options but not on the
+    prompt or chart type, so it can be cached and reused with payload_body.
+
+    Returns:
+        bytes: JSON of the payload's "data" value
+    """
+    return _dumps(_payload_data(data, payload_format, columns, sample_rows))
+
+
+def payload_body(data_json, user_prompt, chart_type="bar", payload_format="records"):
+    """
+    Assemble the JSON request body around already serialized data.
+
+    Only the prompt and chart type are serialized here, so a cached dataset
+    is not serialized again when they change.
+
+    Args:
+        data_json (bytes): Result of encode_payload_data
+
+    Returns:
+        bytes: JSON request body
+    """
+    parts = [
+        b'{"chartType":', _dumps(chart_type),
+        b',"data":', data_json,
+        b',"userPrompt":', _dumps(user_prompt),
+    ]
+    if payload_format == "columnar":
+        parts.append(b',"dataFormat":"columnar"')
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def encode_body(body, compress=False):
+    """
+    Digest and optionally gzip a serialized JSON request body.
+
+    Returns:
+        tuple: (body bytes, extra request headers, metrics dict with payload
+            sizes, a digest of the uncompressed JSON and encoding time)
+    """
+    start = time.perf_counter()
+    raw_bytes = len(body)
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    headers = {}
+    if compress:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+
+    metrics = {
+        "payload_bytes": raw_bytes,
+        "body_bytes": len(body),
+        "payload_digest": digest,
+        "compressed": compress,
+        "serialization_seconds": time.perf_counter() - start,
+    }
+    return body, headers, metrics
@@ -0,0 +1,226 @@
+import operator as operators
+
+import numpy as np
+import pandas as pd
+
+from comparison import DEFAULT_ATOL, DEFAULT_RTOL, join_results, summarize_comparison
+
+# Aggregation names accepted in dataProcessing, mapped to pandas functions
+AGGREGATIONS = {
+    "sum": "sum",
+    "mean": "mean",
+    "avg": "mean",
+    "average": "mean",
+    "count": "count",
+    "min": "min",
+    "max": "max",
+    "median": "median",
+}
+
+# Separator used to build one label from several group keys
+LABEL_SEPARATOR = " - "
+
+
+def _as_list(value):
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def parse_plan(data_processing):
+    """
+    Normalize the dataProcessing section of an API response.
+
+    Args:
+        data_processing (dict): Dictionary containing data processing details
+
+    Returns:
+        dict: "group_by" and "value_fields" lists, "aggregations" as pandas
+            function names and the "filters" list
+
+    Raises:
+        ValueError: If an aggregation is not supported
+    """
+    aggregations = []
+    for aggregation in _as_list(data_processing.get("aggregation")) or ["sum"]:
+        name = str(aggregation).lower()
+        if name not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation: {aggregation}")
+        aggregations.append(AGGREGATIONS[name])
+
+    return {
+        "group_by": _as_list(data_processing.get("groupBy")),
+        "value_fields": _as_list(data_processing.get("valueField")),
+        "aggregations": aggregations,
+        "filters": data_processing.get("filters") or [],
+    }
+
+
+def _normalize_name(name):
+    return " ".join(str(name).replace("_", " ").lower().split())
+
+
+def resolve_column(data, name):
+    """
+    Find the column a plan refers to, ignoring case, underscores and extra spaces.
+
+    Raises:
+        KeyError: If no column matches
+    """
+    if name in data.columns:
+        return name
+    normalized = _normalize_name(name)
+    for col in data.columns:
+        if _normalize_name(col) == normalized:
+            return col
+    raise KeyError(f"Column not found in data: {name}")
+
+
+# Ordered comparison operators accepted in plan filters
+_ORDERED_OPERATORS = {
+    ">": operators.gt,
+    "gt": operators.gt,
+    ">=": operators.ge,
+    "gte": operators.ge,
+    "<": operators.lt,
+    "lt": operators.lt,
+    "<=": operators.le,
+    "lte": operators.le,
+}
+
+
+def _coerce(column, value):
+    # Filter values arrive as JSON; convert them to the column's type
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.cat.categories
+    if isinstance(value, (list, tuple)):
+        return [_coerce(column, item) for item in value]
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return pd.Timestamp(value)
+    if pd.api.types.is_numeric_dtype(column) and isinstance(value, str):
+        return pd.to_numeric(value)
+    return value
+
+
+def _ordered_mask(column, compare, value):
+    # Compacted text columns are unordered categoricals, which only support
+    # equality; compare their categories instead and select the rows by code
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        selected = np.asarray(compare(pd.Series(column.cat.categories), value), dtype=bool)
+        # Missing values have code -1, which picks the trailing False
+        return pd.Series(np.append(selected, False)[column.cat.codes.to_numpy()], index=column.index)
+    return compare(column, value)
+
+
+def plan_filter_mask(data, filters):
+    """
+    Build one boolean mask from the filters declared in a plan.
+
+    Raises:
+        ValueError: If a filter uses an unsupported operator
+    """
+    mask = pd.Series(True, index=data.index)
+    for filter_condition in filters:
+        column = data[resolve_column(data, filter_condition["field"])]
+        operator = filter_condition.get("operator", "==")
+        value = _coerce(column, filter_condition.get("value"))
+        if operator in ("==", "=", "eq"):
+            mask &= column == value
+        elif operator in ("!=", "ne"):
+            mask &= column != value
+        elif operator in _ORDERED_OPERATORS:
+            mask &= _ordered_mask(column, _ORDERED_OPERATORS[operator], value)
+        elif operator == "in":
+            mask &= column.isin(_as_list(value))
+        elif operator in ("not in", "nin"):
+            mask &= ~column.isin(_as_list(value))
+        elif operator == "contains":
+            mask &= column.astype(str).str.contains(str(value), regex=False)
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+    return mask.to_numpy()
+
+
+def result_name(value_field, aggregation):
+    return f"{aggregation}({value_field})"
+
+
+def compute_plan(data, plan):
+    """
+    Compute every aggregation of a plan in a single grouped pass.
+
+    Args:
+        data (pd.DataFrame): Unfiltered data
+        plan (dict): Result of parse_plan
+
+    Returns:
+        pd.DataFrame: A "label" column (group keys joined with LABEL_SEPARATOR)
+            and one column per value field and aggregation, named by result_name
+    """
+    if plan["filters"]:
+        data = data[plan_filter_mask(data, plan["filters"])]
+    group_by = [resolve_column(data, name) for name in plan["group_by"]]
+    value_fields = [resolve_column(data, name) for name in plan["value_fields"]]
+
+    named_aggregations = {}
+    for value_field in value_fields or [None]:
+        for aggregation in plan["aggregations"]:
+            if value_field is None:
+                # Without a value field only row counts are meaningful
+                named_aggregations[result_name("rows", "count")] = (data.columns[0], "size")
+            else:
+                named_aggregations[result_name(value_field, aggregation)] = (value_field, aggregation)
+
+    # Without group keys the whole (filtered) frame forms one group
+    group_keys = group_by or [pd.Series("All", index=data.index, name="label")]
+    grouped = data.groupby(group_keys, observed=True).agg(**named_aggregations).reset_index()
+    if group_by:
+        labels = grouped[group_by].astype(str)
+        label = labels.iloc[:, 0] if len(group_by) == 1 else labels.agg(LABEL_SEPARATOR.join, axis=1)
+    else:
+        label = grouped["label"]
+    grouped = grouped.drop(columns=group_by or ["label"])
+
+    grouped.insert(0, "label", label.to_numpy())
+    return grouped
+
+
+def validate_plan(data, api_response, atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL):
+    """
+    Check an API response against the plan it declares in dataProcessing.
+
+    Datasets of the chart are matched to the plan's results in order.
+
+    Returns:
+        dict: The parsed plan, the expected results, one comparison per
+            result column keyed by its name, and the overall status
+    """
+    plan = parse_plan(api_response.get("dataProcessing", {}))
+    expected = compute_plan(data, plan)
+
+    chart_data = api_response["chartConfig"]["data"]
+    datasets = chart_data.get("datasets", [])
+    result_columns = [col for col in expected.columns if col != "label"]
+
+    comparisons = {}
+    for result_column, dataset in zip(result_columns, datasets):
+        comparisons[result_column] = join_results(
+            expected["label"],
+            expected[result_column],
+            chart_data["labels"],
+            dataset["data"],
+            atol=atol,
+            rtol=rtol,
+        )
+
+    passed = len(result_columns) == len(datasets) and all(
+        summarize_comparison(comparison)["status"] == "Passed" for comparison in comparisons.values()
+    )
+    return {
+        "plan": plan,
+        "expected": expected,
+        "comparisons": comparisons,
+        "status": "Passed" if passed else "Failed",
+    }
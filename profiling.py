@@ -0,0 +1,121 @@
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Prefix of the exported Prometheus metric names
+METRIC_PREFIX = "data_validator"
+
+# tracemalloc is process-wide, so stages traced at once (e.g. from other
+# sessions) share one trace, started by the first and stopped by the last
+_tracing_lock = threading.Lock()
+_traced_stages = 0
+_started_tracing = False
+
+
+def _start_tracing():
+    global _traced_stages, _started_tracing
+    with _tracing_lock:
+        if _traced_stages == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _traced_stages += 1
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracing():
+    global _traced_stages, _started_tracing
+    with _tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _traced_stages -= 1
+        # Tracing started outside this module is left running
+        if _traced_stages == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+        return peak
+
+
+def process_peak_memory():
+    """
+    Return the peak resident memory of the process in bytes, or None if unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunProfile:
+    """
+    Per-stage timings, row counts, byte counts and peak memory of one validation run.
+
+    With trace_memory the peak of Python-level allocations is measured per
+    stage through tracemalloc, which slows the stage down and runs only while
+    a stage is traced; otherwise the process-wide peak resident memory is
+    recorded after each stage.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Time a stage; the yielded dict can be updated with extra values such as rows.
+        """
+        entry = self.stages.setdefault(name, {})
+        if rows is not None:
+            entry["rows"] = rows
+        if self.trace_memory:
+            traced_at_start = _start_tracing()
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = time.perf_counter() - start
+            if self.trace_memory:
+                # Peak allocations above what was traced when the stage began
+                entry["peak_memory_bytes"] = max(_stop_tracing() - traced_at_start, 0)
+            else:
+                entry["peak_memory_bytes"] = process_peak_memory()
+
+    def record(self, name, **values):
+        """
+        Add values measured elsewhere (e.g. payload bytes) to a stage.
+        """
+        self.stages.setdefault(name, {}).update(values)
+
+    def to_dict(self):
+        # Stages still running (e.g. the one logging this profile) have no values yet
+        return {name: dict(entry) for name, entry in self.stages.items() if entry}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, default=str)
+
+    def to_prometheus(self, prefix=METRIC_PREFIX):
+        """
+        Export the numeric stage values in the Prometheus text exposition format.
+        """
+        metrics = {}
+        for name, entry in self.to_dict().items():
+            for field, value in entry.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metrics.setdefault(field, []).append((name, value))
+
+        lines = []
+        for field, samples in metrics.items():
+            metric = f"{prefix}_stage_{field}"
+            lines.append(f"# TYPE {metric} gauge")
+            for name, value in samples:
+                lines.append(f'{metric}{{stage="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
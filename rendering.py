@@ -0,0 +1,51 @@
+import math
+
+import streamlit as st
+
+# Rows shown per page for large tables
+DEFAULT_PAGE_SIZE = 500
+
+# Above this many cells tables are shown without the pandas Styler
+STYLER_MAX_CELLS = 50_000
+
+PAGE_SIZE_OPTIONS = [100, 500, 1000, 5000]
+
+
+def _styled(data):
+    return data.style.set_properties(**{"text-align": "center"}).set_table_styles(
+        [{"selector": "th", "props": [("text-align", "center")]}]
+    )
+
+
+def render_table(data, key, page_size=DEFAULT_PAGE_SIZE, styler_max_cells=STYLER_MAX_CELLS):
+    """
+    Display a DataFrame, paginating and skipping the Styler for large tables.
+
+    Small tables keep the centered Styler look. Larger ones show one page at
+    a time, sliced from the (cached) frame, so render cost depends on the
+    page size rather than on the number of rows.
+
+    Args:
+        data (pd.DataFrame): Table to show
+        key (str): Unique widget key for the page selector
+        page_size (int): Rows per page
+        styler_max_cells (int): Largest table, in cells, rendered through the Styler
+    """
+    if len(data) <= page_size:
+        if data.size <= styler_max_cells:
+            st.dataframe(_styled(data), use_container_width=True)
+        else:
+            st.dataframe(data, use_container_width=True)
+        return
+
+    page_count = math.ceil(len(data) / page_size)
+    page = st.number_input(
+        f"Page (1-{page_count})", min_value=1, max_value=page_count, value=1, step=1, key=f"page_{key}"
+    )
+    start = (page - 1) * page_size
+    page_data = data.iloc[start:start + page_size]
+    if page_data.size <= styler_max_cells:
+        st.dataframe(_styled(page_data), use_container_width=True)
+    else:
+        st.dataframe(page_data, use_container_width=True)
+    st.caption(f"Rows {start + 1}-{start + len(page_data)} of {len(data)}")
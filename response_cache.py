@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Default location and limits of the on-disk API response cache
+DEFAULT_CACHE_DIR = os.environ.get("VISUALIZER_CACHE_DIR", ".visualizer_cache")
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_CACHE_MB = 256
+
+
+def response_key(url, payload_digest):
+    """
+    Build the cache key of a request from its URL and the digest of its serialized payload.
+    """
+    return hashlib.blake2b(f"{url}\n{payload_digest}".encode(), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent cache of API responses stored as one JSON file per request.
+
+    Entries expire after ttl_seconds. When the directory grows beyond
+    max_bytes, the least recently used entries are removed.
+    """
+
+    def __init__(
+        self,
+        directory=DEFAULT_CACHE_DIR,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_bytes=DEFAULT_MAX_CACHE_MB * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """
+        Return the cached response for key, or None if it is missing or expired.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if time.time() - entry["created"] > self.ttl_seconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # The modification time tracks recency for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry["response"]
+
+    def put(self, key, response):
+        """
+        Store a response, then evict old entries if the cache exceeds its size limit.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        entry = json.dumps({"created": time.time(), "response": response}, separators=(",", ":"))
+
+        # Write to a temporary file first so readers never see a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as temp_file:
+            temp_file.write(entry)
+        os.replace(temp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Remove expired entries and the least recently used ones beyond max_bytes.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            now = time.time()
+            total_bytes = sum(size for _, size, _ in entries)
+            for mtime, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes and now - mtime <= self.ttl_seconds:
+                    break
+                self._remove(path)
+                total_bytes -= size
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Shared by the Streamlit app and the batch runner
+response_cache = ResponseCache()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filters import FILTER_BACKENDS, apply_filter_spec
+
+
+@pytest.fixture
+def data():
+    regions = pd.Series(["north", "south", None, "east", "north", np.nan, "west", "south"] * 375)
+    return pd.DataFrame({
+        "region": regions.astype(object),
+        "region_category": regions.astype("category"),
+        "sales": np.arange(len(regions)),
+    })
+
+
+@pytest.mark.parametrize("column", ["region", "region_category"])
+@pytest.mark.parametrize("values", [
+    ["north", "south"],
+    ["north", None],
+    [np.nan],
+    ["west", np.nan, "missing"],
+])
+def test_values_filter_backends_agree(data, column, values):
+    filter_spec = [{"column": column, "kind": "values", "values": values}]
+    expected = data[data[column].isin(values)]
+
+    for backend in FILTER_BACKENDS:
+        filtered = apply_filter_spec(data, filter_spec, backend=backend)
+        pd.testing.assert_frame_equal(filtered, expected, obj=backend)
+
+
+@pytest.mark.parametrize("column", ["region", "region_category"])
+def test_values_filter_keeps_every_row_when_all_values_selected(data, column):
+    values = data[column].unique().tolist()
+    filter_spec = [{"column": column, "kind": "values", "values": values}]
+
+    for backend in FILTER_BACKENDS:
+        assert len(apply_filter_spec(data, filter_spec, backend=backend)) == len(data)
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from log_store import LOG_COLUMNS, LogStore, name_fields_from_plan, parse_test_case_name
+
+
+@pytest.mark.parametrize("name, expected", [
+    (
+        "Aggregating by sum grouped by region on sales",
+        {"aggregation": "sum", "group_by": "region", "value_field": "sales"},
+    ),
+    (
+        "Aggregating by mean grouped by region on sales with filters: region == north",
+        {"aggregation": "mean", "group_by": "region", "value_field": "sales"},
+    ),
+    (
+        "Grouped by location on donations",
+        {"aggregation": None, "group_by": "location", "value_field": "donations"},
+    ),
+    (
+        "Aggregating by sum, mean grouped by region, task on sales, days",
+        {"aggregation": "sum, mean", "group_by": "region, task", "value_field": "sales, days"},
+    ),
+    ("Aggregating by count", {"aggregation": "count", "group_by": None, "value_field": None}),
+    ("", {"aggregation": None, "group_by": None, "value_field": None}),
+])
+def test_parse_test_case_name(name, expected):
+    assert parse_test_case_name(name) == expected
+
+
+def test_name_fields_from_plan():
+    assert name_fields_from_plan({"aggregation": "SUM", "groupBy": "Region", "valueField": "Sales"}) == {
+        "aggregation": "sum", "group_by": "region", "value_field": "sales",
+    }
+    assert name_fields_from_plan({"aggregation": ["sum", "mean"], "groupBy": ["region", "task"]}) == {
+        "aggregation": "sum, mean", "group_by": "region, task", "value_field": None,
+    }
+    assert name_fields_from_plan(None) == {"aggregation": None, "group_by": None, "value_field": None}
+
+
+def test_append_stores_plan_fields(tmp_path):
+    store = LogStore(str(tmp_path / "log.db"))
+    plan = {"aggregation": "sum", "groupBy": "region", "valueField": "sales"}
+    store.append(
+        "Sales per region", "Aggregating by sum grouped by region on sales", pd.DataFrame({"a": [1]}),
+        {"labels": ["north"]}, "Passed", "No issues", name_fields=name_fields_from_plan(plan),
+    )
+
+    options = store.history_options()
+    assert options["group_by"] == ["region"]
+    assert options["value_field"] == ["sales"]
+    assert len(store.query_history(group_bys=["region"], value_fields=["sales"])) == 1
+
+
+def test_import_csv_parses_legacy_names(tmp_path):
+    csv_path = tmp_path / "legacy.csv"
+    pd.DataFrame(
+        [[1, "Legacy", "Aggregating by sum grouped by region on sales", "[]", "{}", "Failed", "None"]],
+        columns=LOG_COLUMNS,
+    ).to_csv(csv_path, index=False)
+    store = LogStore(str(tmp_path / "log.db"))
+
+    assert store.import_csv(csv_path) == 1
+    assert len(store.query_history(aggregations=["sum"], group_bys=["region"], value_fields=["sales"])) == 1
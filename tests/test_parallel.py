@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion import group_sum, optimize_dtypes
+from parallel import parallel_group_sum, use_parallel
+
+WORKERS = 2
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    rows = 20_000
+    keys = np.array([f"k{i}" for i in range(50)], dtype=object)[rng.integers(0, 50, rows)]
+    frame = pd.DataFrame({
+        "key": keys,
+        "number": rng.integers(0, 20, rows).astype(float),
+        "small": rng.integers(-100, 100, rows).astype("int8"),
+        "value": rng.standard_normal(rows) * 1e6,
+    })
+    frame.loc[::7, "key"] = None
+    frame.loc[::13, "number"] = np.nan
+    frame.loc[::11, "value"] = np.nan
+    return frame
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("group_column", ["key", "number", "small"])
+@pytest.mark.parametrize("agg_column", ["value", "small"])
+def test_parallel_group_sum_matches_serial(data, compact, group_column, agg_column):
+    if group_column == agg_column:
+        pytest.skip("grouping by the summed column")
+    frame = optimize_dtypes(data)[0] if compact else data
+    if compact and group_column == "key":
+        assert isinstance(frame["key"].dtype, pd.CategoricalDtype)
+    assert use_parallel(frame, agg_column, WORKERS, min_rows=1000)
+
+    serial = group_sum(frame, group_column, agg_column)
+    parallel = parallel_group_sum(frame, group_column, agg_column, workers=WORKERS)
+
+    pd.testing.assert_frame_equal(parallel, serial, check_exact=True)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion import optimize_dtypes
+from plan import plan_filter_mask, validate_plan
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    rows = 3000
+    dates = pd.date_range("2024-01-01", periods=30).strftime("%Y-%m-%d").to_numpy()
+    frame = pd.DataFrame({
+        "Date": dates[rng.integers(0, len(dates), rows)].astype(object),
+        "Region": np.array(["north", "south", "east", "west"], dtype=object)[rng.integers(0, 4, rows)],
+        "Sales": rng.integers(0, 1000, rows),
+    })
+    frame.loc[::50, "Date"] = None
+    return frame
+
+
+@pytest.mark.parametrize("filters", [
+    [{"field": "Date", "operator": ">=", "value": "2024-01-15"}],
+    [{"field": "Date", "operator": "<", "value": "2024-01-10"}, {"field": "Region", "operator": "!=", "value": "east"}],
+    [{"field": "Region", "operator": "<=", "value": "north"}],
+    [{"field": "Region", "operator": "in", "value": ["west", "south"]}],
+])
+def test_plan_filters_on_compacted_frame(data, filters):
+    compacted, report = optimize_dtypes(data)
+    assert report["converted"]["Date"] == "category"
+
+    np.testing.assert_array_equal(plan_filter_mask(compacted, filters), plan_filter_mask(data, filters))
+
+
+def test_validate_plan_on_compacted_frame(data):
+    data_processing = {
+        "aggregation": "sum",
+        "groupBy": "Region",
+        "valueField": "Sales",
+        "filters": [{"field": "Date", "operator": ">=", "value": "2024-01-15"}],
+    }
+    selected = data[data["Date"].notna() & (data["Date"] >= "2024-01-15")]
+    expected = selected.groupby("Region")["Sales"].sum()
+    api_response = {
+        "dataProcessing": data_processing,
+        "chartConfig": {"data": {"labels": list(expected.index), "datasets": [{"data": expected.tolist()}]}},
+    }
+
+    compacted, _ = optimize_dtypes(data)
+    assert validate_plan(compacted, api_response)["status"] == "Passed"